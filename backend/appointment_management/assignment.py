@@ -0,0 +1,296 @@
+import uuid
+
+from django.db import transaction
+from django.db.models import Case, Exists, OuterRef, Q, Value, When
+
+from .availability import availability_matrix
+from .conflicts import ConflictIndex
+from .distances import get_distance_matrix
+from .models import Appointment, Match, Preference, Referee
+from .schedule import rebuild_matches
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:  # scipy is optional, the pure Python solver gives the same result
+    linear_sum_assignment = None
+
+def hungarian(costs, columns):
+    """
+    Minimum cost assignment of every row to a distinct column (rows <= columns),
+    O(rows^2 * columns). Returns {row: column}.
+    """
+    rows = len(costs)
+    inf = float('inf')
+    u = [0] * (rows + 1)
+    v = [0] * (columns + 1)
+    owner = [0] * (columns + 1)
+    way = [0] * (columns + 1)
+
+    for i in range(1, rows + 1):
+        owner[0] = i
+        j0 = 0
+        minv = [inf] * (columns + 1)
+        used = [False] * (columns + 1)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            row = costs[i0 - 1]
+            ui0 = u[i0]
+            delta = inf
+            j1 = 0
+            for j in range(1, columns + 1):
+                if not used[j]:
+                    reduced = row[j - 1] - ui0 - v[j]
+                    if reduced < minv[j]:
+                        minv[j] = reduced
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(columns + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+
+    return {owner[j] - 1: j - 1 for j in range(1, columns + 1) if owner[j]}
+
+def min_cost_assignment(costs, columns, unassigned_cost):
+    """
+    Assigns rows to distinct columns minimising total cost, where a row may also
+    stay unassigned at unassigned_cost. Pairs costing more than that are never
+    chosen. Returns {row: column} for the assigned rows only.
+    """
+    rows = len(costs)
+    if not rows or not columns:
+        return {}
+
+    # One private "unassigned" column per row keeps the problem always feasible
+    padded = []
+    for index, row in enumerate(costs):
+        dummies = [unassigned_cost * 2] * rows
+        dummies[index] = unassigned_cost
+        padded.append(list(row) + dummies)
+
+    if linear_sum_assignment is not None:
+        row_indexes, column_indexes = linear_sum_assignment(padded)
+        solution = dict(zip(row_indexes.tolist(), column_indexes.tolist()))
+    else:
+        solution = hungarian(padded, columns + rows)
+
+    return {
+        row: column for row, column in solution.items()
+        if column < columns and costs[row][column] < unassigned_cost
+    }
+
+def refresh_assigned(match_ids):
+    """
+    Recomputes Match.is_assigned for the given matches in one UPDATE. Called by
+    the Appointment signals, and after bulk writes, which send no signals.
+    """
+    match_ids = {match_id for match_id in match_ids if match_id}
+    if not match_ids:
+        return
+    active = Appointment.objects.filter(match=OuterRef('pk')).exclude(status=Appointment.cancelled)
+    Match.objects.filter(match_id__in=match_ids).update(
+        is_assigned=Case(When(Exists(active), then=Value(True)), default=Value(False))
+    )
+
+def level_rank(level):
+    try:
+        return int(level)
+    except (TypeError, ValueError):
+        return None
+
+class AssignmentSolver:
+    """
+    Proposes referees for the unassigned matches in a date window. Each match
+    date is solved as a min-cost bipartite matching between that day's matches
+    and the referees available that day, so nobody gets two matches on one day.
+
+    Hard constraints: the referee is available, is not already booked that day,
+    has no relative at either club and, when the match level is numeric, is at
+    least that level. Costs favour preferred venues, short travel and referees
+    closest to the match level, keeping senior referees free for senior matches.
+    """
+    base_cost = 10
+    preferred_venue_bonus = 5
+    level_gap_cost = 2
+    cost_per_km = 0.1
+    unassigned_cost = 10 ** 6
+
+    def __init__(self, start, end, level=None):
+        self.start = start
+        self.end = end
+        self.level = level
+
+    def load(self):
+        matches = Match.objects.between(self.start, self.end).unassigned().ordered()
+        if self.level:
+            matches = matches.filter(level=self.level)
+        self.matches = list(matches.values(
+            'match_id', 'match_date', 'match_time', 'level', 'venue_id', 'home_club_id', 'away_club_id'
+        ))
+
+        self.referee_levels = dict(Referee.objects.values_list('referee_id', 'level'))
+        self.available = {
+            referee_id: available
+            for referee_id, (available, _) in availability_matrix(self.start, self.end).items()
+        }
+
+        self.booked = set(
+            Appointment.objects
+            .filter(appointment_date__range=(self.start, self.end))
+            .exclude(status=Appointment.cancelled)
+            .values_list('referee_id', 'appointment_date')
+        )
+
+        self.preferred_venues = {}
+        for referee_id, venue_id in Preference.objects.values_list('referee_id', 'venue_id'):
+            self.preferred_venues.setdefault(referee_id, set()).add(venue_id)
+
+        self.conflicts = ConflictIndex()
+        self.distances = get_distance_matrix()
+
+    def cost(self, match, referee_id):
+        """
+        Cost of giving the match to the referee, or None when not allowed
+        """
+        if self.conflicts.has_conflict(referee_id, match['home_club_id'], match['away_club_id']):
+            return None
+
+        cost = self.base_cost
+        match_level = level_rank(match['level'])
+        referee_level = level_rank(self.referee_levels.get(referee_id))
+        if match_level is not None and referee_level is not None:
+            if referee_level < match_level:
+                return None
+            cost += (referee_level - match_level) * self.level_gap_cost
+
+        if match['venue_id'] in self.preferred_venues.get(referee_id, ()):
+            cost -= self.preferred_venue_bonus
+
+        distance = self.distances.get(referee_id, match['venue_id'])
+        if distance is not None:
+            cost += distance * self.cost_per_km
+        return cost
+
+    def solve(self):
+        self.load()
+
+        by_date = {}
+        for match in self.matches:
+            by_date.setdefault(match['match_date'], []).append(match)
+
+        assignments, unassigned = [], []
+        for match_date, matches in sorted(by_date.items()):
+            candidates = [
+                referee_id for referee_id, available in self.available.items()
+                if match_date in available and (referee_id, match_date) not in self.booked
+            ]
+            costs = []
+            for match in matches:
+                row = []
+                for referee_id in candidates:
+                    cost = self.cost(match, referee_id)
+                    row.append(self.unassigned_cost * 2 if cost is None else cost)
+                costs.append(row)
+
+            solution = min_cost_assignment(costs, len(candidates), self.unassigned_cost)
+            for index, match in enumerate(matches):
+                if index in solution:
+                    assignments.append({
+                        'match_id': match['match_id'],
+                        'referee_id': candidates[solution[index]],
+                        'match_date': match_date,
+                        'venue_id': match['venue_id'],
+                        'distance': self.distances.get(candidates[solution[index]], match['venue_id']),
+                        'cost': round(costs[index][solution[index]], 2),
+                    })
+                else:
+                    unassigned.append(match['match_id'])
+
+        return {
+            'assignments': assignments,
+            'unassigned': unassigned,
+            'total_cost': round(sum(assignment['cost'] for assignment in assignments), 2),
+        }
+
+class AssignmentConflict(Exception):
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+def commit_assignments(pairs):
+    """
+    Creates one Appointment per (match_id, referee_id) pair in a single
+    transaction. Nothing is written if any match is already assigned, a referee
+    has a relative at one of the clubs or would be booked twice on the same day;
+    AssignmentConflict lists why.
+    """
+    with transaction.atomic():
+        match_ids = [match_id for match_id, _ in pairs]
+        matches = {
+            match.match_id: match
+            for match in Match.objects.select_for_update().filter(match_id__in=match_ids)
+        }
+        referee_ids = set(Referee.objects.filter(
+            referee_id__in={referee_id for _, referee_id in pairs}
+        ).values_list('referee_id', flat=True))
+
+        dates = {match.match_date for match in matches.values()}
+        active = Appointment.objects.exclude(status=Appointment.cancelled)
+        assigned = set(active.filter(match_id__in=match_ids).values_list('match_id', flat=True))
+        booked = set(active.filter(
+            Q(referee_id__in=referee_ids) & Q(appointment_date__in=dates)
+        ).values_list('referee_id', 'appointment_date'))
+
+        conflicts = ConflictIndex()
+        distances = get_distance_matrix()
+        errors, appointments, seen_matches = [], [], set()
+        for match_id, referee_id in pairs:
+            match = matches.get(match_id)
+            if match is None:
+                errors.append(f'{match_id}: match not found')
+                continue
+            if referee_id not in referee_ids:
+                errors.append(f'{match_id}: referee {referee_id} not found')
+                continue
+            if match_id in assigned or match_id in seen_matches:
+                errors.append(f'{match_id}: match already assigned')
+                continue
+            if conflicts.has_conflict(referee_id, match.home_club_id, match.away_club_id):
+                errors.append(f'{match_id}: referee {referee_id} has a relative at one of the clubs')
+                continue
+            if (referee_id, match.match_date) in booked:
+                errors.append(f'{match_id}: referee {referee_id} already booked on {match.match_date}')
+                continue
+
+            seen_matches.add(match_id)
+            booked.add((referee_id, match.match_date))
+            appointments.append(Appointment(
+                appointment_id=f"APT_{uuid.uuid4().hex[:8].upper()}",
+                referee_id=referee_id,
+                venue_id=match.venue_id,
+                match=match,
+                distance=distances.get(referee_id, match.venue_id) or 0,
+                appointment_date=match.match_date,
+                appointment_time=match.match_time,
+                status=Appointment.upcoming,
+            ))
+
+        if errors:
+            raise AssignmentConflict(errors)
+
+        appointments = Appointment.objects.bulk_create(appointments)
+        refresh_assigned(match_ids)
+        rebuild_matches(match_ids)
+        return appointments
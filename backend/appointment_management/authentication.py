@@ -1,29 +1,217 @@
+import threading
+import time
+from collections import OrderedDict
+
 from django.utils.functional import SimpleLazyObject
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.db import connection
+from rest_framework.authentication import SessionAuthentication, get_authorization_header
 from rest_framework.authtoken.models import Token
-from django.utils.deprecation import MiddlewareMixin
+from rest_framework import exceptions
 from django.conf import settings
 
-class TokenAuthenticationMiddleware(MiddlewareMixin):
-    def process_request(self, request):
+class TokenCache:
+    """
+    Bounded LRU cache of token key -> user, with a TTL on every entry.
+
+    When TOKEN_CACHE['CACHE_ALIAS'] names one of the configured CACHES the
+    resolved users are kept there instead of in process memory, so every worker
+    sees a revocation as soon as it happens. Entries are dropped when a token is
+    deleted or its user saved (see signals.py).
+    """
+    key_prefix = 'auth:token:'
+
+    def __init__(self, max_size=1024, timeout=300, cache_alias=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.cache_alias = cache_alias
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        options = getattr(settings, 'TOKEN_CACHE', {})
+        return cls(
+            max_size=options.get('MAX_SIZE', 1024),
+            timeout=options.get('TIMEOUT', 300),
+            cache_alias=options.get('CACHE_ALIAS'),
+        )
+
+    @property
+    def shared(self):
+        if self.cache_alias:
+            return caches[self.cache_alias]
+        return None
+
+    def get(self, key):
+        if self.shared is not None:
+            return self.shared.get(self.key_prefix + key)
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                user, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    return user
+                del self._entries[key]
+        return None
+
+    def set(self, key, user):
+        if self.shared is not None:
+            self.shared.set(self.key_prefix + key, user, self.timeout)
+            return
+
+        with self._lock:
+            self._entries[key] = (user, time.monotonic() + self.timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def resolve(self, key):
         """
-        Adds user object to request if token authentication is successful
+        Returns the user owning the token, or None if the token does not exist
         """
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '').split()
-        if not auth_header or auth_header[0].lower() != 'token':
+        user = self.get(key)
+        if user is not None:
+            return user
+
+        try:
+            token_obj = Token.objects.select_related('user').get(key=key)
+        except Token.DoesNotExist:
             return None
 
+        self.set(key, token_obj.user)
+        return token_obj.user
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.shared is not None:
+            self.shared.delete(self.key_prefix + key)
+
+    def invalidate_user(self, user):
+        """
+        Drops every cached token belonging to user. Call this before the
+        tokens are deleted so the shared cache keys can still be looked up;
+        tokens deleted later are dropped again by the Token post_delete signal.
+        """
+        with self._lock:
+            stale = [key for key, (cached, _) in self._entries.items() if cached.pk == user.pk]
+            for key in stale:
+                del self._entries[key]
+
+        if self.shared is not None:
+            keys = Token.objects.filter(user=user).values_list('key', flat=True)
+            self.shared.delete_many([self.key_prefix + key for key in keys])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+token_cache = TokenCache.from_settings()
+
+class Principal:
+    """
+    The identity a request was authenticated as, resolved once per request
+    """
+    def __init__(self, user, token=None, method=None, error=None):
+        self.user = user
+        self.token = token
+        self.method = method
+        self.error = error
+
+class QueryCounter:
+    """
+    connection.execute_wrapper hook that counts the queries it sees
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+def _resolve(request):
+    auth_header = get_authorization_header(request).split()
+    if auth_header and auth_header[0].lower() == b'token':
         if len(auth_header) != 2:
-            return None
+            return Principal(AnonymousUser(), method='token', error='Invalid token header.')
+
+        try:
+            key = auth_header[1].decode()
+        except UnicodeError:
+            return Principal(AnonymousUser(), method='token', error='Invalid token header.')
+
+        user = token_cache.resolve(key)
+        if user is None:
+            return Principal(AnonymousUser(), method='token', error='Invalid token.')
+        if not user.is_active:
+            return Principal(AnonymousUser(), method='token', error='User inactive or deleted.')
+        return Principal(user, token=key, method='token')
+
+    if hasattr(request, 'session'):
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            return Principal(user, method='session')
+
+    return Principal(AnonymousUser())
+
+def resolve_principal(request):
+    """
+    Authenticates a Django request by token first, falling back to the session.
+    The result is memoised on the request, along with request.auth_query_count,
+    the number of database queries the resolution needed.
+    """
+    principal = getattr(request, '_principal', None)
+    if principal is not None:
+        return principal
+
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        principal = _resolve(request)
+
+    request._principal = principal
+    request.auth_query_count = counter.count
+    return principal
+
+class RequestAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    Replaces Django's AuthenticationMiddleware: request.user is resolved lazily
+    through resolve_principal, so the token/session lookup runs at most once
+    whether Django, the admin or DRF asks for it first.
+    """
+    def process_request(self, request):
+        request.user = SimpleLazyObject(lambda: resolve_principal(request).user)
+
+    def process_response(self, request, response):
+        if hasattr(request, 'auth_query_count'):
+            response['X-Auth-Queries'] = str(request.auth_query_count)
+        return response
+
+class RequestAuthentication(SessionAuthentication):
+    """
+    DRF authentication class that reuses the principal resolved by
+    RequestAuthenticationMiddleware instead of querying again. Session
+    authenticated requests still go through DRF's CSRF check.
+    """
+    def authenticate(self, request):
+        principal = resolve_principal(request._request)
+        if principal.error:
+            raise exceptions.AuthenticationFailed(principal.error)
+
+        if principal.method == 'token':
+            return (principal.user, principal.token)
 
-        token = auth_header[1]
+        if principal.method == 'session':
+            self.enforce_csrf(request)
+            return (principal.user, None)
 
-        def get_user():
-            try:
-                token_obj = Token.objects.select_related('user').get(key=token)
-                return token_obj.user
-            except Token.DoesNotExist:
-                return AnonymousUser()
+        return None
 
-        request.user = SimpleLazyObject(get_user)
-        return None
\ No newline at end of file
+    def authenticate_header(self, request):
+        return 'Token'
@@ -0,0 +1,305 @@
+from collections import namedtuple
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Availability, AvailabilityRule, Referee
+
+def bump_availability_version(referee_id):
+    """
+    Increments and returns the referee's availability version. Call inside the
+    transaction that writes the availability rows.
+    """
+    Referee.objects.filter(pk=referee_id).update(availability_version=F('availability_version') + 1)
+    return Referee.objects.filter(pk=referee_id).values_list('availability_version', flat=True).get()
+
+def get_availability_version(referee_id):
+    return Referee.objects.filter(pk=referee_id).values_list('availability_version', flat=True).first()
+
+def availability_snapshot(referee_id):
+    """
+    The referee's available and unavailable dates, with weekly rules expanded
+    for the current season (see availability_dates)
+    """
+    available_dates, unavailable_dates = availability_dates(referee_id)
+    return {
+        'availableDates': available_dates,
+        'unavailableDates': unavailable_dates,
+    }
+
+def is_stale(client_version, version):
+    """
+    True unless the client held the version immediately before this write
+    """
+    try:
+        return int(client_version) != version - 1
+    except (TypeError, ValueError):
+        return True
+
+def expand_dates(start, end, weekdays=None):
+    """
+    Every date from start to end inclusive, optionally only on the given weekdays ('Mon'..'Sun')
+    """
+    dates = []
+    day = start
+    while day <= end:
+        if not weekdays or day.strftime('%a') in weekdays:
+            dates.append(day)
+        day += timedelta(days=1)
+    return dates
+
+def apply_availability(entries):
+    """
+    Upserts (referee_id, date, availableType) entries set-wise: one query reads
+    the existing rows in the affected window, then changed rows are written with
+    bulk_update and new ones with bulk_create. Later entries for the same
+    referee and date win. Returns {(referee_id, date): 'created'|'updated'|'unchanged'}
+    and bumps the availability version of every referee touched; call inside a
+    transaction.
+    """
+    wanted = {}
+    for referee_id, day, available_type in entries:
+        wanted[(referee_id, day)] = available_type
+    if not wanted:
+        return {}, {}
+
+    referee_ids = {referee_id for referee_id, _ in wanted}
+    dates = [day for _, day in wanted]
+    existing = {}
+    rows = Availability.objects.filter(
+        referee_id__in=referee_ids,
+        date__range=(min(dates), max(dates))
+    )
+    for row in rows:
+        existing.setdefault((row.referee_id, row.date), row)
+
+    outcome, to_create, to_update = {}, [], []
+    for (referee_id, day), available_type in wanted.items():
+        weekday = day.strftime('%a')
+        row = existing.get((referee_id, day))
+        if row is None:
+            to_create.append(Availability(
+                referee_id=referee_id, date=day, availableType=available_type, weekday=weekday
+            ))
+            outcome[(referee_id, day)] = 'created'
+        elif row.availableType != available_type or row.weekday != weekday:
+            row.availableType = available_type
+            row.weekday = weekday
+            to_update.append(row)
+            outcome[(referee_id, day)] = 'updated'
+        else:
+            outcome[(referee_id, day)] = 'unchanged'
+
+    Availability.objects.bulk_create(to_create, batch_size=500)
+    Availability.objects.bulk_update(to_update, ['availableType', 'weekday'], batch_size=500)
+
+    Referee.objects.filter(pk__in=referee_ids).update(availability_version=F('availability_version') + 1)
+    versions = dict(
+        Referee.objects.filter(pk__in=referee_ids).values_list('referee_id', 'availability_version')
+    )
+    return outcome, versions
+
+def collapse_runs(dates):
+    """
+    Collapses dates into [start, end] runs of consecutive days
+    """
+    runs = []
+    for day in sorted(set(dates)):
+        if runs and day - runs[-1][1] == timedelta(days=1):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return runs
+
+def season_window(season):
+    """
+    Seasons run with the calendar year
+    """
+    return date(season, 1, 1), date(season, 12, 31)
+
+class DateBitmap:
+    """
+    One bit per day of a window (bit 0 = start), giving O(1) membership tests
+    and a payload of a few dozen hex characters per season
+    """
+    def __init__(self, start, end, bits=0):
+        self.start = start
+        self.end = end
+        self.bits = bits
+
+    @classmethod
+    def from_dates(cls, start, end, dates):
+        bitmap = cls(start, end)
+        for day in dates:
+            bitmap.add(day)
+        return bitmap
+
+    @classmethod
+    def from_hex(cls, start, end, encoded):
+        return cls(start, end, int(encoded, 16) if encoded else 0)
+
+    @property
+    def days(self):
+        return (self.end - self.start).days + 1
+
+    def offset(self, day):
+        index = (day - self.start).days
+        if 0 <= index < self.days:
+            return index
+        return None
+
+    def add(self, day):
+        index = self.offset(day)
+        if index is not None:
+            self.bits |= 1 << index
+
+    def __contains__(self, day):
+        index = self.offset(day)
+        return index is not None and bool(self.bits >> index & 1)
+
+    def dates(self):
+        return [self.start + timedelta(days=index) for index in range(self.days) if self.bits >> index & 1]
+
+    def to_hex(self):
+        return format(self.bits, 'x')
+
+    def runs(self):
+        """
+        Run-length encoding as [offset, length] pairs of set days
+        """
+        runs = []
+        bits, index = self.bits, 0
+        while bits:
+            if bits & 1:
+                if runs and runs[-1][0] + runs[-1][1] == index:
+                    runs[-1][1] += 1
+                else:
+                    runs.append([index, 1])
+            bits >>= 1
+            index += 1
+        return runs
+
+def get_season_bitmaps(referee_id, season):
+    """
+    The referee's available and unavailable bitmaps for a season, cached under
+    the referee's availability version so any write invalidates them
+    """
+    version = get_availability_version(referee_id)
+    if version is None:
+        return None
+
+    start, end = season_window(season)
+    key = f'availability:bitmap:{referee_id}:{season}:{version}'
+    encoded = cache.get(key)
+    if encoded is None:
+        available, unavailable = DateBitmap(start, end), DateBitmap(start, end)
+        days = resolve_availability(start, end, [referee_id]).get(referee_id, {})
+        for day, resolved_day in days.items():
+            (available if resolved_day.availableType == 'A' else unavailable).add(day)
+        encoded = (available.to_hex(), unavailable.to_hex())
+        cache.set(key, encoded, 86400)
+
+    return (
+        DateBitmap.from_hex(start, end, encoded[0]),
+        DateBitmap.from_hex(start, end, encoded[1]),
+    )
+
+class ResolvedDay(namedtuple('ResolvedDay', 'availableType start_time end_time source')):
+    """
+    A referee's availability on one date; source is 'rule' or 'date'
+    """
+
+def weekday_dates(start, end):
+    """
+    {'Mon': [dates...], ...} for the window
+    """
+    by_weekday = {}
+    for day in expand_dates(start, end):
+        by_weekday.setdefault(day.strftime('%a'), []).append(day)
+    return by_weekday
+
+def resolve_availability(start, end, referee_ids=None):
+    """
+    Evaluates recurring rules for the window only and lays the explicit date rows
+    over them. Returns {referee_id: {date: ResolvedDay}} in two queries, however
+    long the referees' availability history is. referee_ids=None means everyone.
+    """
+    rules = AvailabilityRule.objects.filter(valid_from__lte=end).filter(
+        Q(valid_until__isnull=True) | Q(valid_until__gte=start)
+    )
+    rows = Availability.objects.filter(date__range=(start, end))
+    if referee_ids is not None:
+        rules = rules.filter(referee_id__in=referee_ids)
+        rows = rows.filter(referee_id__in=referee_ids)
+
+    by_weekday = weekday_dates(start, end)
+    resolved = {}
+    # Later rules win over earlier ones for the same weekday
+    for rule in rules.order_by('valid_from', 'rule_id'):
+        days = resolved.setdefault(rule.referee_id, {})
+        resolved_day = ResolvedDay(rule.availableType, rule.start_time, rule.end_time, 'rule')
+        for day in by_weekday.get(rule.weekday, ()):
+            if day >= rule.valid_from and (rule.valid_until is None or day <= rule.valid_until):
+                days[day] = resolved_day
+
+    values = rows.values_list('referee_id', 'date', 'availableType', 'start_time', 'end_time')
+    for referee_id, day, available_type, start_time, end_time in values:
+        resolved.setdefault(referee_id, {})[day] = ResolvedDay(available_type, start_time, end_time, 'date')
+
+    return resolved
+
+def availability_matrix(start, end, referee_ids=None):
+    """
+    {referee_id: (available DateBitmap, unavailable DateBitmap)} for the window,
+    with rules and explicit dates resolved
+    """
+    matrix = {}
+    for referee_id, days in resolve_availability(start, end, referee_ids).items():
+        available, unavailable = DateBitmap(start, end), DateBitmap(start, end)
+        for day, resolved_day in days.items():
+            (available if resolved_day.availableType == 'A' else unavailable).add(day)
+        matrix[referee_id] = (available, unavailable)
+    return matrix
+
+def availability_dates(referee_id, start=None, end=None):
+    """
+    The referee's sorted available and unavailable dates between the optional
+    start and end, explicit dates overriding the weekly rules. Rules can only be
+    expanded over a bounded window, so an open bound stops them at the edge of
+    the season the other bound (or today) falls in; explicit dates are read
+    however far they go, as before rules existed.
+    """
+    season_start, season_end = season_window((start or end or timezone.now().date()).year)
+    window_start, window_end = start or season_start, end or season_end
+
+    days = {
+        day: resolved_day.availableType
+        for day, resolved_day in resolve_availability(window_start, window_end, [referee_id]).get(referee_id, {}).items()
+    }
+    if start is None or end is None:
+        outside = (
+            Availability.objects
+            .filter(referee_id=referee_id, availableType__in=['A', 'U'])
+            .exclude(date__range=(window_start, window_end))
+        )
+        if start is not None:
+            outside = outside.filter(date__gte=start)
+        if end is not None:
+            outside = outside.filter(date__lte=end)
+        days.update(outside.values_list('date', 'availableType'))
+
+    available = sorted(day for day, available_type in days.items() if available_type == 'A')
+    unavailable = sorted(day for day, available_type in days.items() if available_type == 'U')
+    return available, unavailable
+
+def available_referee_ids(day):
+    """
+    Referees available on the day once rules and explicit dates are resolved
+    """
+    return [
+        referee_id
+        for referee_id, days in resolve_availability(day, day).items()
+        if day in days and days[day].availableType == 'A'
+    ]
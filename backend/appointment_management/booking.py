@@ -0,0 +1,80 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Appointment
+
+DEFAULTS = {
+    'DEFAULT_MINUTES': 90,
+    'BY_LEVEL': {},
+}
+
+def get_options():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, 'MATCH_DURATION', {}))
+    return options
+
+def match_duration(level=None):
+    """
+    Estimated length of a match of the given Match.level
+    """
+    options = get_options()
+    return timedelta(minutes=options['BY_LEVEL'].get(level, options['DEFAULT_MINUTES']))
+
+# key identifies the booking in the caller's batch; appointment_id is None for
+# a new appointment and excluded from the check for an update
+Booking = namedtuple('Booking', 'key appointment_id referee_id date time level')
+
+def interval(day, start, level):
+    begin = datetime.combine(day, start)
+    return begin, begin + match_duration(level)
+
+def find_overlaps(bookings):
+    """
+    Checks new or changed bookings against each other and the referees' other
+    active appointments on the same days, in one query on the (referee,
+    appointment_date) index. Returns {key: [overlapping appointment ids or keys]}.
+    Intervals that only touch do not overlap.
+    """
+    bookings = [booking for booking in bookings if booking.time is not None]
+    if not bookings:
+        return {}
+
+    days = {}
+    for booking in bookings:
+        days.setdefault((booking.referee_id, booking.date), []).append(
+            (booking.key, booking.appointment_id, *interval(booking.date, booking.time, booking.level))
+        )
+
+    changed_ids = {booking.appointment_id for booking in bookings if booking.appointment_id}
+    existing = (
+        Appointment.objects
+        .filter(
+            Q(referee_id__in={referee_id for referee_id, _ in days})
+            & Q(appointment_date__in={day for _, day in days})
+        )
+        .exclude(status=Appointment.cancelled)
+        .exclude(appointment_time__isnull=True)
+        .exclude(appointment_id__in=changed_ids)
+        .values_list('appointment_id', 'referee_id', 'appointment_date', 'appointment_time', 'match__level')
+    )
+    booked = {}
+    for appointment_id, referee_id, day, start, level in existing:
+        if (referee_id, day) in days:
+            booked.setdefault((referee_id, day), []).append((appointment_id, *interval(day, start, level)))
+
+    overlaps = {}
+    # A referee has a handful of appointments a day, so pairwise checks per day are cheap
+    for referee_day, intervals in days.items():
+        for index, (key, _, begin, end) in enumerate(intervals):
+            others = booked.get(referee_day, []) + [
+                (other_key, other_begin, other_end)
+                for other_index, (other_key, _, other_begin, other_end) in enumerate(intervals)
+                if other_index != index
+            ]
+            clashes = [other for other, other_begin, other_end in others if begin < other_end and other_begin < end]
+            if clashes:
+                overlaps[key] = clashes
+    return overlaps
@@ -0,0 +1,89 @@
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 3600,
+}
+
+def get_options():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, 'REFERENCE_DATA_CACHE', {}))
+    return options
+
+def get_cache():
+    return caches[get_options()['CACHE_ALIAS']]
+
+def version_key(group):
+    return f'response-cache:{group}:version'
+
+def get_version(group):
+    """
+    Returns the (token, modified) stamp of a cache group, starting a new one if
+    needed. Stamps expire with the cached responses, so workers that do not
+    share the cache pick up another worker's changes within TIMEOUT.
+    """
+    return get_cache().get_or_set(
+        version_key(group), lambda: (uuid.uuid4().hex, int(time.time())), get_options()['TIMEOUT']
+    )
+
+def bump_version(group):
+    """
+    Invalidates every cached response in the group
+    """
+    get_cache().set(version_key(group), (uuid.uuid4().hex, int(time.time())), get_options()['TIMEOUT'])
+
+class CachedResponseMixin:
+    """
+    Caches list and retrieve responses of read-mostly ViewSets until the data in
+    their cache_group changes (see signals.py), and answers conditional GETs
+    carrying a matching If-None-Match or a current If-Modified-Since with 304.
+    """
+    cache_group = None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        token, modified = get_version(self.cache_group)
+        path = request.get_full_path()
+        digest = hashlib.md5(f'{token}:{path}'.encode()).hexdigest()
+        etag = quote_etag(digest)
+
+        if self.is_not_modified(request, etag, modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            cache = get_cache()
+            key = f'response-cache:{self.cache_group}:{digest}'
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(key, response.data, get_options()['TIMEOUT'])
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(modified)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def is_not_modified(self, request, etag, modified):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+
+        if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        return if_modified_since is not None and modified <= if_modified_since
@@ -0,0 +1,59 @@
+from .caching import get_cache, get_options
+from .models import Relative
+
+INDEX_KEY = 'conflicts:referee-clubs'
+
+def build_conflict_index():
+    index = {}
+    for referee_id, club_id in Relative.objects.values_list('referee_id', 'club_id'):
+        index.setdefault(referee_id, set()).add(club_id)
+    return {referee_id: frozenset(clubs) for referee_id, clubs in index.items()}
+
+def get_conflict_index():
+    """
+    {referee_id: frozenset of club ids the referee has relatives at}, built with
+    one query and kept in the cache until a Relative changes (see signals.py).
+    With a per-process cache other workers only see the change once the entry
+    times out, so the timeout bounds how stale the check can be.
+    """
+    cache = get_cache()
+    index = cache.get(INDEX_KEY)
+    if index is None:
+        index = build_conflict_index()
+        cache.set(INDEX_KEY, index, get_options()['TIMEOUT'])
+    return index
+
+def invalidate_conflict_index():
+    get_cache().delete(INDEX_KEY)
+
+class ConflictIndex:
+    """
+    Snapshot of the conflict index for answering many checks in one request
+    """
+    def __init__(self, index=None):
+        self.index = get_conflict_index() if index is None else index
+
+    def has_conflict(self, referee_id, *club_ids):
+        excluded = self.index.get(referee_id)
+        return bool(excluded) and any(club_id in excluded for club_id in club_ids)
+
+    def conflicted_referees(self, *club_ids):
+        """
+        Referees with a relative at any of the clubs
+        """
+        club_ids = set(club_ids)
+        return {referee_id for referee_id, excluded in self.index.items() if not excluded.isdisjoint(club_ids)}
+
+    def for_matches(self, matches):
+        """
+        {match_id: referees in conflict} for (match_id, home_club_id, away_club_id)
+        rows, e.g. a whole round of matches
+        """
+        by_club = {}
+        for referee_id, excluded in self.index.items():
+            for club_id in excluded:
+                by_club.setdefault(club_id, set()).add(referee_id)
+        return {
+            match_id: by_club.get(home_club_id, set()) | by_club.get(away_club_id, set())
+            for match_id, home_club_id, away_club_id in matches
+        }
@@ -0,0 +1,97 @@
+import math
+
+from .caching import get_cache, get_options, get_version
+from .models import Referee, Venue
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, distances are then computed in pure Python
+    np = None
+
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(origin, destination):
+    """
+    Great-circle distance between two (latitude, longitude) points
+    """
+    lat1, lon1 = map(math.radians, origin)
+    lat2, lon2 = map(math.radians, destination)
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(h, 1.0)))
+
+def haversine_matrix(origins, destinations):
+    """
+    Distances in km from every origin to every destination, as a list of rows.
+    Points are (latitude, longitude); a None point gives None distances.
+    """
+    if np is not None and origins and destinations:
+        a = np.radians(np.array([point or (np.nan, np.nan) for point in origins], dtype=float))
+        b = np.radians(np.array([point or (np.nan, np.nan) for point in destinations], dtype=float))
+        lat1, lon1 = a[:, 0:1], a[:, 1:2]
+        lat2, lon2 = b[:, 0], b[:, 1]
+        h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+        return [[None if math.isnan(d) else d for d in row] for row in distances.tolist()]
+
+    return [
+        [haversine_km(origin, destination) if origin and destination else None for destination in destinations]
+        for origin in origins
+    ]
+
+def coordinates(obj):
+    if obj is None or obj.latitude is None or obj.longitude is None:
+        return None
+    return (obj.latitude, obj.longitude)
+
+def distance_between(referee, venue):
+    """
+    Referee to venue distance in km, or None if either is not geocoded
+    """
+    origin, destination = coordinates(referee), coordinates(venue)
+    if origin is None or destination is None:
+        return None
+    return haversine_km(origin, destination)
+
+class DistanceMatrix:
+    """
+    Referee x venue distances in km for every geocoded referee and venue
+    """
+    def __init__(self, referee_ids, venue_ids, rows):
+        self.referee_index = {referee_id: index for index, referee_id in enumerate(referee_ids)}
+        self.venue_index = {venue_id: index for index, venue_id in enumerate(venue_ids)}
+        self.rows = rows
+
+    @classmethod
+    def build(cls):
+        referees = Referee.objects.filter(latitude__isnull=False, longitude__isnull=False).values_list(
+            'referee_id', 'latitude', 'longitude'
+        )
+        venues = Venue.objects.filter(latitude__isnull=False, longitude__isnull=False).values_list(
+            'venue_id', 'latitude', 'longitude'
+        )
+        referees, venues = list(referees), list(venues)
+        return cls(
+            [referee_id for referee_id, _, _ in referees],
+            [venue_id for venue_id, _, _ in venues],
+            haversine_matrix([(lat, lon) for _, lat, lon in referees], [(lat, lon) for _, lat, lon in venues])
+        )
+
+    def get(self, referee_id, venue_id):
+        referee_index = self.referee_index.get(referee_id)
+        venue_index = self.venue_index.get(venue_id)
+        if referee_index is None or venue_index is None:
+            return None
+        return self.rows[referee_index][venue_index]
+
+def get_distance_matrix():
+    """
+    The DistanceMatrix, cached until a referee or venue changes (see signals.py)
+    """
+    token, _ = get_version('locations')
+    key = f'distances:matrix:{token}'
+    cache = get_cache()
+    matrix = cache.get(key)
+    if matrix is None:
+        matrix = DistanceMatrix.build()
+        cache.set(key, matrix, get_options()['TIMEOUT'])
+    return matrix
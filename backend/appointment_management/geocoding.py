@@ -0,0 +1,96 @@
+import csv
+import logging
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BACKEND': 'appointment_management.geocoding.GazetteerGeocoder',
+    'GAZETTEER': None,
+}
+
+def get_options():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, 'GEOCODING', {}))
+    return options
+
+def normalize_place(name):
+    return ' '.join(str(name).lower().replace(',', ' ').split())
+
+class Geocoder:
+    """
+    Turns a place name or postcode into (latitude, longitude), or None when it
+    is unknown. Subclass and point GEOCODING['BACKEND'] at it to plug in
+    another source.
+    """
+    def __init__(self, **options):
+        self.options = options
+
+    def geocode(self, query):
+        raise NotImplementedError
+
+class GazetteerGeocoder(Geocoder):
+    """
+    Offline geocoder reading a local CSV gazetteer with name, latitude and
+    longitude columns, where name is a suburb, town or postcode. Names are
+    matched case- and whitespace-insensitively.
+    """
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._places = None
+        self._lock = threading.Lock()
+
+    @property
+    def places(self):
+        if self._places is None:
+            with self._lock:
+                if self._places is None:
+                    self._places = self.load(self.options.get('GAZETTEER'))
+        return self._places
+
+    def load(self, path):
+        places = {}
+        if not path:
+            return places
+        try:
+            with open(path, newline='', encoding='utf-8') as gazetteer:
+                for row in csv.DictReader(gazetteer):
+                    try:
+                        places[normalize_place(row['name'])] = (float(row['latitude']), float(row['longitude']))
+                    except (KeyError, TypeError, ValueError):
+                        continue
+        except OSError as e:
+            logger.warning(f"Gazetteer {path} could not be read: {str(e)}")
+        return places
+
+    def geocode(self, query):
+        if not query:
+            return None
+        return self.places.get(normalize_place(query))
+
+_geocoder = None
+
+def get_geocoder():
+    global _geocoder
+    if _geocoder is None:
+        options = get_options()
+        _geocoder = import_string(options['BACKEND'])(**options)
+    return _geocoder
+
+def reset_geocoder():
+    """
+    Drops the configured geocoder, e.g. after GEOCODING changes in tests
+    """
+    global _geocoder
+    _geocoder = None
+
+def geocode_first(*queries):
+    geocoder = get_geocoder()
+    for query in queries:
+        coordinates = geocoder.geocode(query)
+        if coordinates is not None:
+            return coordinates
+    return None
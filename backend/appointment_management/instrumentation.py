@@ -0,0 +1,165 @@
+import re
+import time
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import override_settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'STRICT': False,
+    'N_PLUS_ONE_THRESHOLD': 5,
+}
+
+_whitespace = re.compile(r'\s+')
+_string_literal = re.compile(r"'(?:[^']|'')*'")
+_number_literal = re.compile(r'\b\d+(?:\.\d+)?\b')
+_placeholder_list = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+
+def get_options():
+    options = dict(DEFAULTS)
+    options.update(getattr(settings, 'QUERY_INSTRUMENTATION', {}))
+    return options
+
+def normalize_sql(sql):
+    """
+    Reduces a query to its shape so queries differing only in parameters compare equal
+    """
+    sql = _string_literal.sub('?', sql)
+    sql = _number_literal.sub('?', sql)
+    sql = _placeholder_list.sub('(...)', sql)
+    return _whitespace.sub(' ', sql).strip()
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+class QueryRecorder:
+    """
+    connection.execute_wrapper hook that records every query and its duration
+    """
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def repeated_shapes(self, threshold):
+        """
+        Returns {shape: count} for every query shape seen at least threshold times,
+        which is what a per-row (N+1) lookup looks like
+        """
+        shapes = Counter(normalize_sql(sql) for sql, _ in self.queries)
+        return {shape: count for shape, count in shapes.items() if count >= threshold}
+
+def get_query_budget(request):
+    """
+    Looks up the budget declared in the resolved ViewSet's query_budgets for the
+    current action. A '<action>:<view>' key, e.g. 'list:compact', takes precedence
+    when the request selects an alternative representation with ?view=.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None, None
+
+    view_class = getattr(match.func, 'cls', None)
+    actions = getattr(match.func, 'actions', None) or {}
+    action = actions.get(request.method.lower())
+    budgets = getattr(view_class, 'query_budgets', None) or {}
+    if action is None:
+        return None, None
+
+    keys = [action]
+    variant = request.GET.get('view')
+    if variant:
+        keys.insert(0, f"{action}:{variant}")
+    for key in keys:
+        if key in budgets:
+            return f"{view_class.__name__}.{key}", budgets[key]
+    return None, None
+
+class QueryInstrumentationMiddleware:
+    """
+    Development/test-mode middleware that counts the queries behind each request,
+    reports repeated query shapes (N+1) and checks the ViewSet's declared
+    query_budgets. Enabled through QUERY_INSTRUMENTATION['ENABLED']; with STRICT
+    set a violation raises QueryBudgetExceeded instead of logging a warning.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        options = get_options()
+        if not options['ENABLED']:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+
+        response['X-Query-Count'] = str(recorder.count)
+        problems = []
+
+        repeated = recorder.repeated_shapes(options['N_PLUS_ONE_THRESHOLD'])
+        if repeated:
+            response['X-Query-Repeated'] = str(len(repeated))
+            for shape, count in repeated.items():
+                problems.append(f"N+1 on {request.path}: {count} x {shape}")
+
+        name, budget = get_query_budget(request)
+        if budget is not None and recorder.count > budget:
+            problems.append(
+                f"{name} ran {recorder.count} queries, budget is {budget} ({request.path})"
+            )
+
+        if problems:
+            if options['STRICT']:
+                raise QueryBudgetExceeded('\n'.join(problems))
+            for problem in problems:
+                logger.warning(problem)
+
+        return response
+
+class QueryBudgetTestMixin:
+    """
+    TestCase mixin that runs every request in strict instrumentation mode, so an
+    endpoint exceeding its query budget or issuing N+1 queries fails the test
+    """
+    query_instrumentation = {
+        'ENABLED': True,
+        'STRICT': True,
+        'N_PLUS_ONE_THRESHOLD': DEFAULTS['N_PLUS_ONE_THRESHOLD'],
+    }
+
+    def setUp(self):
+        super().setUp()
+        override = override_settings(QUERY_INSTRUMENTATION=self.query_instrumentation)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def query_count(self, response, exclude_auth=False):
+        """
+        Queries behind the response; exclude_auth leaves out the token/session
+        lookup, which depends on whether the token cache was warm
+        """
+        count = int(response['X-Query-Count'])
+        if exclude_auth:
+            count -= int(response.get('X-Auth-Queries', 0))
+        return count
+
+    def assertQueryCount(self, response, expected, exclude_auth=False):
+        self.assertEqual(self.query_count(response, exclude_auth), expected)
+
+    def assertMaxQueries(self, response, maximum, exclude_auth=False):
+        self.assertLessEqual(self.query_count(response, exclude_auth), maximum)
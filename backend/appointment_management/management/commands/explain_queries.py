@@ -0,0 +1,53 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, NotSupportedError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.viewsets import GenericViewSet
+
+from appointment_management.urls import router
+
+class Command(BaseCommand):
+    help = "Prints the SQL and execution plan of each ViewSet's default list query"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'prefixes', nargs='*',
+            help='Router prefixes to explain, e.g. appointments matches (default: all)'
+        )
+        parser.add_argument(
+            '--params', default='',
+            help='Query string passed to every ViewSet, e.g. "level=2"'
+        )
+        parser.add_argument(
+            '--staff', action='store_true',
+            help='Explain as a staff user (default: as a referee, which adds the per-user filters)'
+        )
+
+    def handle(self, *args, **options):
+        user = User(id=0, username='explain', is_staff=options['staff'])
+        path = f"/?{options['params']}" if options['params'] else '/'
+
+        for prefix, viewset, _ in router.registry:
+            if options['prefixes'] and prefix not in options['prefixes']:
+                continue
+            # Plain ViewSets (e.g. assignments) have no list query to explain
+            if not issubclass(viewset, GenericViewSet):
+                continue
+
+            request = Request(APIRequestFactory().get(path))
+            request.user = user
+
+            view = viewset()
+            view.action = 'list'
+            view.request = request
+            view.args, view.kwargs, view.format_kwarg = (), {}, None
+            queryset = view.filter_queryset(view.get_queryset())
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{viewset.__name__} (/api/{prefix}/)"))
+            self.stdout.write(str(queryset.query))
+            try:
+                self.stdout.write(queryset.explain())
+            except (NotSupportedError, DatabaseError) as e:
+                self.stdout.write(self.style.WARNING(f"No execution plan available: {e}"))
+            self.stdout.write('')
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from appointment_management.caching import bump_version
+from appointment_management.geocoding import geocode_first
+from appointment_management.models import Referee, Venue
+from appointment_management.signals import place_queries
+
+class Command(BaseCommand):
+    help = 'Fills in venue and referee coordinates from the configured geocoder'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Geocode every row again, not only the ones without coordinates'
+        )
+
+    def handle(self, *args, **options):
+        for model in (Venue, Referee):
+            queryset = model.objects.all()
+            if not options['force']:
+                queryset = queryset.filter(latitude__isnull=True)
+
+            found, missing = [], 0
+            for instance in queryset.iterator():
+                coordinates = geocode_first(*place_queries(instance))
+                if coordinates is None:
+                    missing += 1
+                    continue
+                instance.latitude, instance.longitude = coordinates
+                found.append(instance)
+
+            # bulk_update skips the save signals, so the caches are dropped here
+            model.objects.bulk_update(found, ['latitude', 'longitude'], batch_size=500)
+            self.stdout.write(f'{model.__name__}: {len(found)} geocoded, {missing} not found')
+            if model is Venue and found:
+                # Cached venue, club and team responses render venue coordinates
+                bump_version('reference')
+
+        bump_version('locations')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from appointment_management.schedule import rebuild_all
+
+class Command(BaseCommand):
+    help = 'Rebuilds the denormalized ScheduleEntry read model from appointments and matches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = rebuild_all(batch_size=options['batch_size'])
+        self.stdout.write(f'{count} schedule entries written')
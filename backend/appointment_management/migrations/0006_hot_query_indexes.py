@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointment_management", "0005_remove_appointment_appointment_appoint_be0173_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(fields=["referee", "appointment_date"], name="appointment_referee_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(fields=["appointment_date", "appointment_time"], name="appointment_date_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="availability",
+            index=models.Index(fields=["referee", "date", "availableType"], name="availability_ref_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(fields=["match_date", "match_time"], name="match_date_time_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(fields=["referee", "date"], name="notification_referee_date_idx"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointment_management", "0006_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="referee",
+            name="availability_version",
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointment_management", "0007_referee_availability_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AvailabilityRule",
+            fields=[
+                ("rule_id", models.AutoField(primary_key=True, serialize=False)),
+                (
+                    "weekday",
+                    models.CharField(
+                        choices=[
+                            ("Mon", "Monday"),
+                            ("Tue", "Tuesday"),
+                            ("Wed", "Wednesday"),
+                            ("Thu", "Thursday"),
+                            ("Fri", "Friday"),
+                            ("Sat", "Saturday"),
+                            ("Sun", "Sunday"),
+                        ],
+                        max_length=3,
+                    ),
+                ),
+                ("start_time", models.TimeField(blank=True, null=True)),
+                ("end_time", models.TimeField(blank=True, null=True)),
+                (
+                    "availableType",
+                    models.CharField(
+                        choices=[("A", "Available"), ("U", "Unavailable")],
+                        default="A",
+                        max_length=1,
+                    ),
+                ),
+                ("valid_from", models.DateField()),
+                ("valid_until", models.DateField(blank=True, null=True)),
+                (
+                    "referee",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to="appointment_management.referee",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "AvailabilityRule",
+                "managed": True,
+                "indexes": [
+                    models.Index(
+                        fields=["referee", "valid_from"],
+                        name="availability_rule_ref_idx",
+                    )
+                ],
+            },
+        ),
+    ]
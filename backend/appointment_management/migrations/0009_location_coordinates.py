@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointment_management", "0008_availabilityrule"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="referee",
+            name="latitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="referee",
+            name="longitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="venue",
+            name="latitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="venue",
+            name="longitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
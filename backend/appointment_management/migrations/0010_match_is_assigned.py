@@ -0,0 +1,38 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:28
+
+from django.db import migrations, models
+
+
+def backfill_is_assigned(apps, schema_editor):
+    Appointment = apps.get_model("appointment_management", "Appointment")
+    Match = apps.get_model("appointment_management", "Match")
+    active = Appointment.objects.filter(match=models.OuterRef("pk")).exclude(status="cancelled")
+    Match.objects.update(
+        is_assigned=models.Case(
+            models.When(models.Exists(active), then=models.Value(True)),
+            default=models.Value(False),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointment_management", "0009_location_coordinates"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="match",
+            name="is_assigned",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(backfill_is_assigned, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(
+                fields=["is_assigned", "match_date", "match_time"],
+                name="match_open_date_idx",
+            ),
+        ),
+    ]
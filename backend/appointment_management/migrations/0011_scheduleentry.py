@@ -0,0 +1,105 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:28
+
+from django.db import migrations, models
+
+
+def entry_fields(match=None, appointment=None):
+    # Mirrors schedule.build_entry, which uses the current models
+    fields = {}
+    if match is not None:
+        fields.update(
+            entry_id=f"M:{match.match_id}",
+            match_id=match.match_id,
+            date=match.match_date,
+            time=match.match_time,
+            level=match.level,
+            home_club_id=match.home_club_id,
+            home_club_name=match.home_club.club_name,
+            away_club_id=match.away_club_id,
+            away_club_name=match.away_club.club_name,
+            venue_id=match.venue_id,
+            venue_name=match.venue.venue_name,
+        )
+    if appointment is not None:
+        fields.update(
+            entry_id=f"A:{appointment.appointment_id}",
+            appointment_id=appointment.appointment_id,
+            date=appointment.appointment_date,
+            time=appointment.appointment_time,
+            status=appointment.status,
+            venue_id=appointment.venue_id,
+            venue_name=appointment.venue.venue_name,
+            referee_id=appointment.referee_id,
+            referee_name=f"{appointment.referee.first_name} {appointment.referee.last_name}",
+            distance=appointment.distance,
+        )
+    return fields
+
+
+def backfill_schedule(apps, schema_editor):
+    Appointment = apps.get_model("appointment_management", "Appointment")
+    Match = apps.get_model("appointment_management", "Match")
+    ScheduleEntry = apps.get_model("appointment_management", "ScheduleEntry")
+
+    entries = []
+    appointments = {}
+    for appointment in Appointment.objects.select_related("referee", "venue").iterator(chunk_size=1000):
+        if appointment.match_id is None:
+            entries.append(ScheduleEntry(**entry_fields(appointment=appointment)))
+        else:
+            appointments.setdefault(appointment.match_id, []).append(appointment)
+    matches = Match.objects.select_related("home_club", "away_club", "venue")
+    for match in matches.iterator(chunk_size=1000):
+        for appointment in appointments.get(match.match_id) or [None]:
+            entries.append(ScheduleEntry(**entry_fields(match, appointment)))
+    ScheduleEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointment_management", "0010_match_is_assigned"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScheduleEntry",
+            fields=[
+                (
+                    "entry_id",
+                    models.CharField(max_length=60, primary_key=True, serialize=False),
+                ),
+                ("match_id", models.CharField(db_index=True, max_length=50, null=True)),
+                (
+                    "appointment_id",
+                    models.CharField(db_index=True, max_length=50, null=True),
+                ),
+                ("date", models.DateField()),
+                ("time", models.TimeField(null=True)),
+                ("level", models.CharField(max_length=50, null=True)),
+                ("status", models.CharField(max_length=10, null=True)),
+                ("home_club_id", models.CharField(max_length=50, null=True)),
+                ("home_club_name", models.CharField(max_length=50, null=True)),
+                ("away_club_id", models.CharField(max_length=50, null=True)),
+                ("away_club_name", models.CharField(max_length=50, null=True)),
+                ("venue_id", models.CharField(max_length=50, null=True)),
+                ("venue_name", models.CharField(max_length=50, null=True)),
+                ("referee_id", models.CharField(max_length=50, null=True)),
+                ("referee_name", models.CharField(max_length=101, null=True)),
+                ("distance", models.FloatField(null=True)),
+            ],
+            options={
+                "db_table": "ScheduleEntry",
+                "managed": True,
+                "indexes": [
+                    models.Index(
+                        fields=["date", "time", "entry_id"], name="schedule_date_idx"
+                    ),
+                    models.Index(
+                        fields=["referee_id", "date"], name="schedule_referee_date_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_schedule, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointment_management", "0011_scheduleentry"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(
+                fields=["home_club", "match_date", "match_time"],
+                name="match_home_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(
+                fields=["away_club", "match_date", "match_time"],
+                name="match_away_date_idx",
+            ),
+        ),
+    ]
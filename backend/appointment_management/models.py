@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .queries import MatchQuerySet
+
 class PasswordReset(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     reset_token = models.CharField(max_length=100, null=True, blank=True)
@@ -37,6 +39,10 @@ class Appointment(models.Model):
     class Meta:
         managed = True
         db_table = 'Appointment'
+        indexes = [
+            models.Index(fields=['referee', 'appointment_date'], name='appointment_referee_date_idx'),
+            models.Index(fields=['appointment_date', 'appointment_time'], name='appointment_date_time_idx'),
+        ]
 
     def __str__(self):
         return f"{self.appointment_id} - {self.appointment_date}"
@@ -67,6 +73,31 @@ class Availability(models.Model):
     class Meta:
         managed = True
         db_table = 'Availability'
+        indexes = [
+            models.Index(fields=['referee', 'date', 'availableType'], name='availability_ref_date_idx'),
+        ]
+
+class AvailabilityRule(models.Model):
+    """
+    Recurring weekly availability, e.g. every Saturday 08:00-14:00 until the end
+    of the season. Expanded lazily for the requested window; explicit
+    Availability rows on a date override it.
+    """
+    rule_id = models.AutoField(primary_key=True)
+    referee = models.ForeignKey('Referee', models.DO_NOTHING)
+    weekday = models.CharField(max_length=3, choices=Availability.main_days)
+    start_time = models.TimeField(null=True, blank=True)
+    end_time = models.TimeField(null=True, blank=True)
+    availableType = models.CharField(max_length=1, choices=Availability.allowed_types, default='A')
+    valid_from = models.DateField()
+    valid_until = models.DateField(null=True, blank=True)
+
+    class Meta:
+        managed = True
+        db_table = 'AvailabilityRule'
+        indexes = [
+            models.Index(fields=['referee', 'valid_from'], name='availability_rule_ref_idx'),
+        ]
 
 class Club(models.Model):
     club_id = models.CharField(db_column='club_ID', primary_key=True, max_length=50)
@@ -88,10 +119,22 @@ class Match(models.Model):
     match_date = models.DateField()
     level = models.CharField(max_length=50)
     match_time = models.TimeField(null=True)
+    # True while the match has an appointment that is not cancelled; maintained
+    # by the Appointment signals (see assignment.refresh_assigned)
+    is_assigned = models.BooleanField(default=False)
+
+    objects = MatchQuerySet.as_manager()
 
     class Meta:
         managed = True
         db_table = 'Match'
+        indexes = [
+            models.Index(fields=['match_date', 'match_time'], name='match_date_time_idx'),
+            models.Index(fields=['is_assigned', 'match_date', 'match_time'], name='match_open_date_idx'),
+            # Seeks for the two halves of a club's fixtures (home_club OR away_club)
+            models.Index(fields=['home_club', 'match_date', 'match_time'], name='match_home_date_idx'),
+            models.Index(fields=['away_club', 'match_date', 'match_time'], name='match_away_date_idx'),
+        ]
 
 class Notification(models.Model):
     notification_id = models.CharField(primary_key=True, max_length=50)
@@ -103,6 +146,9 @@ class Notification(models.Model):
     class Meta:
         managed = True
         db_table = 'Notification'
+        indexes = [
+            models.Index(fields=['referee', 'date'], name='notification_referee_date_idx'),
+        ]
 
 class Preference(models.Model):
     referee = models.ForeignKey('Referee', models.DO_NOTHING, db_column='referee_ID')
@@ -141,6 +187,11 @@ class Referee(models.Model):
     phone_number = models.CharField(max_length=50)
     experience_years = models.IntegerField()
     level = models.CharField(max_length=1, choices=LEVEL_CHOICES, default='0')
+    # Incremented on every availability write, so clients can tell if their copy is stale
+    availability_version = models.IntegerField(default=0)
+    # Geocoded from zip_code or location when the referee is saved (see geocoding.py)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
 
     class Meta:
         managed = True
@@ -158,11 +209,46 @@ class Relative(models.Model):
         managed = True
         db_table = 'Relative'
 
+class ScheduleEntry(models.Model):
+    """
+    Denormalized read model of the schedule: one row per appointment, plus one
+    per match without any appointment, carrying the club, venue and referee
+    names so calendar reads need no joins. Maintained by signals (see
+    schedule.py); rebuild with the rebuild_schedule command.
+    """
+    entry_id = models.CharField(primary_key=True, max_length=60)
+    match_id = models.CharField(max_length=50, null=True, db_index=True)
+    appointment_id = models.CharField(max_length=50, null=True, db_index=True)
+    date = models.DateField()
+    time = models.TimeField(null=True)
+    level = models.CharField(max_length=50, null=True)
+    status = models.CharField(max_length=10, null=True)
+    home_club_id = models.CharField(max_length=50, null=True)
+    home_club_name = models.CharField(max_length=50, null=True)
+    away_club_id = models.CharField(max_length=50, null=True)
+    away_club_name = models.CharField(max_length=50, null=True)
+    venue_id = models.CharField(max_length=50, null=True)
+    venue_name = models.CharField(max_length=50, null=True)
+    referee_id = models.CharField(max_length=50, null=True)
+    referee_name = models.CharField(max_length=101, null=True)
+    distance = models.FloatField(null=True)
+
+    class Meta:
+        managed = True
+        db_table = 'ScheduleEntry'
+        indexes = [
+            models.Index(fields=['date', 'time', 'entry_id'], name='schedule_date_idx'),
+            models.Index(fields=['referee_id', 'date'], name='schedule_referee_date_idx'),
+        ]
+
 class Venue(models.Model):
     venue_id = models.CharField(db_column='venue_ID', primary_key=True, max_length=50)
     venue_name = models.CharField(max_length=50)
     capacity = models.IntegerField()
     location = models.CharField(max_length=50)
+    # Geocoded from location when the venue is saved (see geocoding.py)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
 
     class Meta:
         managed = True
@@ -0,0 +1,144 @@
+import base64
+import json
+from functools import reduce
+from operator import and_, or_
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks past the last row of the previous page on a
+    unique composite ordering, so there is no COUNT(*) and no OFFSET scan and
+    deep pages cost the same as the first one. The last ordering field must be
+    unique. NULLs are assumed to sort first, as they do on SQL Server.
+    """
+    ordering = ()
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.fields = [queryset.model._meta.get_field(name) for name in self.ordering]
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.seek(position))
+
+        page_size = self.get_page_size(request)
+        rows = list(queryset[:page_size + 1])
+        self.next_position = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_position = self.position_of(rows[-1], queryset)
+        return rows
+
+    def seek(self, position):
+        """
+        Lexicographic (a, b, c) > (x, y, z) as an index-friendly OR of ANDs
+        """
+        clauses = []
+        for index, field in enumerate(self.fields):
+            equal = [self.equals(f.name, position[i]) for i, f in enumerate(self.fields[:index])]
+            clauses.append(reduce(and_, equal + [self.after(field.name, position[index])]))
+        return reduce(or_, clauses)
+
+    def equals(self, name, value):
+        if value is None:
+            return Q(**{f'{name}__isnull': True})
+        return Q(**{name: value})
+
+    def after(self, name, value):
+        if value is None:
+            return Q(**{f'{name}__isnull': False})
+        return Q(**{f'{name}__gt': value})
+
+    def position_of(self, row, queryset):
+        if isinstance(row, tuple):
+            names = queryset.query.values_select
+            return [row[names.index(field.attname)] for field in self.fields]
+        return [getattr(row, field.attname) for field in self.fields]
+
+    def encode_cursor(self, position):
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in position]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if len(values) != len(self.fields):
+                raise ValueError
+            return [
+                None if value is None else field.to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_first_link(self):
+        return remove_query_param(self.base_url, self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'first': self.get_first_link(),
+            'results': data,
+        })
+
+class AppointmentKeysetPagination(KeysetPagination):
+    ordering = ('appointment_date', 'appointment_time', 'appointment_id')
+
+class MatchKeysetPagination(KeysetPagination):
+    ordering = ('match_date', 'match_time', 'match_id')
+
+class ScheduleKeysetPagination(KeysetPagination):
+    ordering = ('date', 'time', 'entry_id')
+    page_size = 100
+    max_page_size = 500
+
+class KeysetPaginationMixin:
+    """
+    ViewSet mixin that switches to keyset_pagination_class when the request opts
+    in with ?pagination=cursor or carries a cursor, keeping page numbers otherwise
+    """
+    keyset_pagination_class = None
+
+    def use_keyset_pagination(self):
+        params = self.request.query_params
+        return self.keyset_pagination_class is not None and (
+            params.get('pagination') == 'cursor' or 'cursor' in params
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.use_keyset_pagination():
+                self._paginator = self.keyset_pagination_class()
+            else:
+                return super().paginator
+        return self._paginator
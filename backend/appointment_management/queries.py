@@ -0,0 +1,50 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+class MatchQuerySet(models.QuerySet):
+    """
+    Composable match queries shared by the match, team, club and venue views.
+    Chain the filters and finish with for_serializer() and ordered(), e.g.
+
+        Match.objects.for_club(club_id).upcoming().for_serializer().ordered()
+
+    so every endpoint renders MatchSerializer from one joined query.
+    """
+    # Everything MatchSerializer renders
+    serializer_related = ('home_club__home_venue', 'away_club__home_venue', 'venue', 'referee__user')
+    ordering = ('match_date', 'match_time', 'match_id')
+
+    def for_serializer(self):
+        return self.select_related(*self.serializer_related)
+
+    def ordered(self):
+        return self.order_by(*self.ordering)
+
+    def upcoming(self):
+        return self.filter(match_date__gte=timezone.now().date())
+
+    def between(self, start, end):
+        return self.filter(match_date__range=(start, end))
+
+    def home_of(self, club_id):
+        return self.filter(home_club_id=club_id)
+
+    def away_of(self, club_id):
+        return self.filter(away_club_id=club_id)
+
+    def for_club(self, club_id):
+        """
+        Home and away matches in one query, an OR rather than a UNION so the
+        result can still be joined, filtered and paginated
+        """
+        return self.filter(Q(home_club_id=club_id) | Q(away_club_id=club_id))
+
+    def at_venue(self, venue_id):
+        return self.filter(venue_id=venue_id)
+
+    def unassigned(self):
+        """
+        Matches without an active appointment, an index seek on match_open_date_idx
+        """
+        return self.filter(is_assigned=False)
@@ -0,0 +1,255 @@
+from rest_framework.response import Response
+
+from .models import (
+    Appointment,
+    Club,
+    Match,
+    Notification,
+    Preference,
+    Referee,
+    Venue
+)
+
+def format_date(value):
+    return value.strftime('%Y-%m-%d')
+
+def format_time(value):
+    return value.strftime('%H:%M')
+
+class CompactSpec:
+    """
+    Describes the compact representation of a model: a flat row built straight
+    from a .values_list() tuple. columns are (name, lookup, converter) triples
+    and references maps a column to the 'included' section its id points at.
+    """
+    model = None
+    columns = ()
+    references = {}
+
+    def __init__(self):
+        self.names = tuple(name for name, _, _ in self.columns)
+        self.lookups = tuple(lookup for _, lookup, _ in self.columns)
+        self.converters = tuple(
+            (index, converter)
+            for index, (_, _, converter) in enumerate(self.columns)
+            if converter is not None
+        )
+        self.reference_indexes = tuple(
+            (self.names.index(name), kind) for name, kind in self.references.items()
+        )
+
+    def values(self, queryset):
+        return queryset.values_list(*self.lookups)
+
+    def build(self, rows, referenced=None):
+        """
+        Turns value tuples into dicts, adding every referenced id to referenced[kind]
+        """
+        names = self.names
+        converters = self.converters
+        reference_indexes = self.reference_indexes
+        results = []
+        for row in rows:
+            if converters:
+                row = list(row)
+                for index, converter in converters:
+                    if row[index] is not None:
+                        row[index] = converter(row[index])
+            if referenced is not None:
+                for index, kind in reference_indexes:
+                    if row[index] is not None:
+                        referenced.setdefault(kind, set()).add(row[index])
+            results.append(dict(zip(names, row)))
+        return results
+
+class VenueSpec(CompactSpec):
+    model = Venue
+    columns = (
+        ('venue_id', 'venue_id', None),
+        ('venue_name', 'venue_name', None),
+        ('capacity', 'capacity', None),
+        ('location', 'location', None),
+    )
+
+class ClubSpec(CompactSpec):
+    model = Club
+    columns = (
+        ('club_id', 'club_id', None),
+        ('club_name', 'club_name', None),
+        ('home_venue', 'home_venue_id', None),
+        ('contact_name', 'contact_name', None),
+        ('contact_phone_number', 'contact_phone_number', None),
+    )
+    references = {'home_venue': 'venues'}
+
+class RefereeSpec(CompactSpec):
+    model = Referee
+    columns = (
+        ('referee_id', 'referee_id', None),
+        ('first_name', 'first_name', None),
+        ('last_name', 'last_name', None),
+        ('level', 'level', None),
+        ('location', 'location', None),
+    )
+
+class MatchSpec(CompactSpec):
+    model = Match
+    columns = (
+        ('match_id', 'match_id', None),
+        ('referee', 'referee_id', None),
+        ('home_club', 'home_club_id', None),
+        ('away_club', 'away_club_id', None),
+        ('venue', 'venue_id', None),
+        ('match_date', 'match_date', format_date),
+        ('match_time', 'match_time', format_time),
+        ('level', 'level', None),
+    )
+    references = {'referee': 'referees', 'home_club': 'clubs', 'away_club': 'clubs', 'venue': 'venues'}
+
+class AppointmentSpec(CompactSpec):
+    model = Appointment
+    columns = (
+        ('appointment_id', 'appointment_id', None),
+        ('referee', 'referee_id', None),
+        ('venue', 'venue_id', None),
+        ('match', 'match_id', None),
+        ('distance', 'distance', None),
+        ('appointment_date', 'appointment_date', format_date),
+        ('appointment_time', 'appointment_time', format_time),
+        ('status', 'status', None),
+    )
+    references = {'referee': 'referees', 'venue': 'venues', 'match': 'matches'}
+
+class NotificationSpec(CompactSpec):
+    model = Notification
+    columns = (
+        ('notification_id', 'notification_id', None),
+        ('referee', 'referee_id', None),
+        ('match', 'match_id', None),
+        ('notification_type', 'notification_type', None),
+        ('date', 'date', format_date),
+    )
+    references = {'referee': 'referees', 'match': 'matches'}
+
+class PreferenceSpec(CompactSpec):
+    model = Preference
+    columns = (
+        ('preference_ID', 'preference_ID', None),
+        ('referee', 'referee_id', None),
+        ('venue', 'venue_id', None),
+    )
+    references = {'referee': 'referees', 'venue': 'venues'}
+
+# Side-loaded sections, in an order where a section only references later ones
+INCLUDED_SPECS = {
+    'matches': MatchSpec(),
+    'clubs': ClubSpec(),
+    'referees': RefereeSpec(),
+    'venues': VenueSpec(),
+}
+
+def build_included(referenced):
+    """
+    Fetches each referenced section once, keyed by primary key
+    """
+    included = {}
+    for kind, spec in INCLUDED_SPECS.items():
+        ids = referenced.pop(kind, None)
+        if not ids:
+            continue
+        pk_name = spec.model._meta.pk.name
+        rows = spec.values(spec.model.objects.filter(pk__in=ids))
+        included[kind] = {row[pk_name]: row for row in spec.build(rows, referenced)}
+    return included
+
+# Nested serializer fields that normalize() replaces with a key into 'included'
+NESTED_SECTIONS = {
+    'match': ('matches', 'match_id'),
+    'home_club': ('clubs', 'club_id'),
+    'away_club': ('clubs', 'club_id'),
+    'club': ('clubs', 'club_id'),
+    'referee': ('referees', 'referee_id'),
+    'venue': ('venues', 'venue_id'),
+    'home_venue': ('venues', 'venue_id'),
+}
+
+def normalize(rows):
+    """
+    Moves nested venue/club/referee/match representations out of serialized
+    rows into an included map, leaving their key in place. Each object is
+    walked once however many rows reference it.
+    """
+    included = {}
+
+    def extract(obj):
+        for field, (section, key_name) in NESTED_SECTIONS.items():
+            value = obj.get(field)
+            if not isinstance(value, dict):
+                continue
+            key = value.get(key_name)
+            objects = included.setdefault(section, {})
+            if key not in objects:
+                objects[key] = value
+                extract(value)
+            obj[field] = key
+
+    for row in rows:
+        extract(row)
+    return included
+
+class RepresentationViewMixin:
+    """
+    ViewSet mixin selecting the list representation with ?view=:
+
+    - compact: rows carry ids only and the venues, clubs, referees and matches
+      they reference are side-loaded once per response under 'included'
+    - normalized: the regular serializer output, with every nested venue, club,
+      referee and match moved to 'included' and replaced by its key
+    """
+    compact_spec = None
+
+    def get_representation(self):
+        view = self.request.query_params.get('view')
+        if view == 'compact' and self.compact_spec is None:
+            return None
+        if view in ('compact', 'normalized'):
+            return view
+        return None
+
+    def compact_response(self, queryset):
+        spec = self.compact_spec()
+        rows = spec.values(queryset)
+        referenced = {}
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            results = spec.build(page, referenced)
+            response = self.get_paginated_response(results)
+        else:
+            results = spec.build(rows, referenced)
+            response = Response({'results': results})
+
+        response.data['included'] = build_included(referenced)
+        return response
+
+    def list_response(self, queryset):
+        representation = self.get_representation()
+        if representation == 'compact':
+            return self.compact_response(queryset)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+        else:
+            serializer = self.get_serializer(queryset, many=True)
+            response = Response(serializer.data)
+
+        if representation == 'normalized':
+            if page is None:
+                response.data = {'results': response.data}
+            response.data['included'] = normalize(response.data['results'])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()))
@@ -0,0 +1,107 @@
+from django.db import transaction
+
+from .models import Appointment, Club, Match, Referee, ScheduleEntry, Venue
+
+def referee_name(referee):
+    return f'{referee.first_name} {referee.last_name}'
+
+def build_entry(match=None, appointment=None):
+    entry = ScheduleEntry(
+        entry_id=f'A:{appointment.appointment_id}' if appointment else f'M:{match.match_id}',
+    )
+    if match is not None:
+        entry.match_id = match.match_id
+        entry.date = match.match_date
+        entry.time = match.match_time
+        entry.level = match.level
+        entry.home_club_id = match.home_club_id
+        entry.home_club_name = match.home_club.club_name
+        entry.away_club_id = match.away_club_id
+        entry.away_club_name = match.away_club.club_name
+        entry.venue_id = match.venue_id
+        entry.venue_name = match.venue.venue_name
+    if appointment is not None:
+        entry.appointment_id = appointment.appointment_id
+        entry.date = appointment.appointment_date
+        entry.time = appointment.appointment_time
+        entry.status = appointment.status
+        entry.venue_id = appointment.venue_id
+        entry.venue_name = appointment.venue.venue_name
+        entry.referee_id = appointment.referee_id
+        entry.referee_name = referee_name(appointment.referee)
+        entry.distance = appointment.distance
+    return entry
+
+def appointments_with_names():
+    return Appointment.objects.select_related('referee', 'venue')
+
+def matches_with_names():
+    return Match.objects.select_related('home_club', 'away_club', 'venue')
+
+def rebuild_matches(match_ids):
+    """
+    Rewrites the entries of the given matches and their appointments
+    """
+    match_ids = {match_id for match_id in match_ids if match_id}
+    if not match_ids:
+        return
+    appointments = {}
+    for appointment in appointments_with_names().filter(match_id__in=match_ids):
+        appointments.setdefault(appointment.match_id, []).append(appointment)
+
+    entries = []
+    for match in matches_with_names().filter(match_id__in=match_ids):
+        for appointment in appointments.get(match.match_id) or [None]:
+            entries.append(build_entry(match, appointment))
+
+    with transaction.atomic():
+        ScheduleEntry.objects.filter(match_id__in=match_ids).delete()
+        ScheduleEntry.objects.filter(appointment_id__in=[entry.appointment_id for entry in entries]).delete()
+        ScheduleEntry.objects.bulk_create(entries)
+
+def rebuild_appointments(appointment_ids):
+    """
+    Rewrites the entries of the given appointments that have no match. Entries
+    of appointments that do have one are left to rebuild_matches.
+    """
+    appointment_ids = set(appointment_ids)
+    if not appointment_ids:
+        return
+    entries = [
+        build_entry(appointment=appointment)
+        for appointment in appointments_with_names().filter(appointment_id__in=appointment_ids, match__isnull=True)
+    ]
+    with transaction.atomic():
+        ScheduleEntry.objects.filter(appointment_id__in=appointment_ids).delete()
+        ScheduleEntry.objects.bulk_create(entries)
+
+def rebuild_all(batch_size=1000):
+    """
+    Rebuilds the whole read model, e.g. after a migration or bulk import
+    """
+    with transaction.atomic():
+        ScheduleEntry.objects.all().delete()
+        entries = []
+        appointments = {}
+        for appointment in appointments_with_names().iterator(chunk_size=batch_size):
+            if appointment.match_id is None:
+                entries.append(build_entry(appointment=appointment))
+            else:
+                appointments.setdefault(appointment.match_id, []).append(appointment)
+        for match in matches_with_names().iterator(chunk_size=batch_size):
+            for appointment in appointments.get(match.match_id) or [None]:
+                entries.append(build_entry(match, appointment))
+        ScheduleEntry.objects.bulk_create(entries, batch_size=batch_size)
+    return len(entries)
+
+def rename(instance):
+    """
+    Copies a changed club, venue or referee name into the entries showing it
+    """
+    if isinstance(instance, Club):
+        ScheduleEntry.objects.filter(home_club_id=instance.pk).update(home_club_name=instance.club_name)
+        ScheduleEntry.objects.filter(away_club_id=instance.pk).update(away_club_name=instance.club_name)
+    elif isinstance(instance, Venue):
+        ScheduleEntry.objects.filter(venue_id=instance.pk).update(venue_name=instance.venue_name)
+    elif isinstance(instance, Referee):
+        ScheduleEntry.objects.filter(referee_id=instance.pk).update(referee_name=referee_name(instance))
@@ -1,14 +1,19 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from .booking import Booking, find_overlaps
+from .conflicts import ConflictIndex
+from .distances import distance_between
 from .models import (
     Appointment,
     Availability,
+    AvailabilityRule,
     Club,
     Match,
     Notification,
     Preference,
     Referee,
     Relative,
+    ScheduleEntry,
     Venue,
     PasswordReset
 )
@@ -25,7 +30,7 @@ class UserSerializer(serializers.ModelSerializer):
 class VenueSerializer(serializers.ModelSerializer):
     class Meta:
         model = Venue
-        fields = ['venue_id', 'venue_name', 'capacity', 'location']
+        fields = ['venue_id', 'venue_name', 'capacity', 'location', 'latitude', 'longitude']
 
 class ClubSerializer(serializers.ModelSerializer):
     home_venue = VenueSerializer(read_only=True)
@@ -154,13 +159,47 @@ class AppointmentWriteSerializer(serializers.ModelSerializer):
     def validate(self, data):
         # Ensure required fields are present
         required_fields = ['referee', 'venue', 'appointment_date', 'appointment_time']
+        # A partial update is checked against the appointment as it will be saved
+        values = {}
+        if self.partial and self.instance is not None:
+            values = {field: getattr(self.instance, field) for field in required_fields + ['match', 'status']}
+        values.update(data)
         for field in required_fields:
-            if field not in data:
+            if field not in values:
                 raise serializers.ValidationError({field: ["This field is required."]})
 
+        match = values.get('match')
+        if match is not None and ConflictIndex().has_conflict(
+            values['referee'].referee_id, match.home_club_id, match.away_club_id
+        ):
+            raise serializers.ValidationError({
+                'referee': ["Referee has a relative at one of the match's clubs."]
+            })
+
+        if values.get('status', Appointment.upcoming) != Appointment.cancelled:
+            booking = Booking(
+                key=None,
+                appointment_id=self.instance.appointment_id if self.instance else None,
+                referee_id=values['referee'].referee_id,
+                date=values['appointment_date'],
+                time=values['appointment_time'],
+                level=match.level if match is not None else None,
+            )
+            overlaps = find_overlaps([booking])
+            if overlaps:
+                raise serializers.ValidationError({
+                    'appointment_time': [
+                        f"Referee is already booked at this time ({', '.join(overlaps[None])})."
+                    ]
+                })
+
         return data
 
     def create(self, validated_data):
+        if not validated_data.get('distance'):
+            distance = distance_between(validated_data['referee'], validated_data['venue'])
+            if distance is not None:
+                validated_data['distance'] = distance
         return super().create(validated_data)
 
 class AvailabilitySerializer(serializers.ModelSerializer):
@@ -175,6 +214,18 @@ class AvailabilityWriteSerializer(serializers.ModelSerializer):
         model = Availability
         fields = ['availableID', 'referee', 'date', 'start_time', 'end_time', 'duration', 'availableType', 'weekday']
 
+class AvailabilityRuleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AvailabilityRule
+        fields = ['rule_id', 'referee', 'weekday', 'start_time', 'end_time', 'availableType', 'valid_from', 'valid_until']
+
+    def validate(self, data):
+        valid_from = data.get('valid_from', getattr(self.instance, 'valid_from', None))
+        valid_until = data.get('valid_until', getattr(self.instance, 'valid_until', None))
+        if valid_until and valid_from and valid_until < valid_from:
+            raise serializers.ValidationError({'valid_until': ["Must not be before valid_from."]})
+        return data
+
 class NotificationSerializer(serializers.ModelSerializer):
     referee = RefereeSerializer(read_only=True)
     match = MatchSerializer(read_only=True)
@@ -218,4 +269,13 @@ class PasswordResetSerializer(serializers.ModelSerializer):
     class Meta:
         model = PasswordReset
         fields = ['user', 'reset_token', 'token_created']
-        read_only_fields = ['user', 'reset_token', 'token_created']
\ No newline at end of file
+        read_only_fields = ['user', 'reset_token', 'token_created']
+
+class ScheduleEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ScheduleEntry
+        fields = [
+            'entry_id', 'match_id', 'appointment_id', 'date', 'time', 'level', 'status',
+            'home_club_id', 'home_club_name', 'away_club_id', 'away_club_name',
+            'venue_id', 'venue_name', 'referee_id', 'referee_name', 'distance'
+        ]
@@ -0,0 +1,112 @@
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .assignment import refresh_assigned
+from .authentication import token_cache
+from .caching import bump_version
+from .conflicts import invalidate_conflict_index
+from .geocoding import geocode_first, reset_geocoder
+from .models import Appointment, Club, Match, Referee, Relative, ScheduleEntry, Venue
+from .schedule import rebuild_appointments, rebuild_matches, rename
+
+@receiver([post_save, post_delete], sender=Venue)
+@receiver([post_save, post_delete], sender=Club)
+def invalidate_reference_data(sender, **kwargs):
+    # After commit, so a concurrent read cannot cache the old rows under the new version
+    transaction.on_commit(partial(bump_version, 'reference'))
+
+@receiver(post_delete, sender=Token)
+def revoke_cached_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+@receiver(post_save, sender=User)
+def refresh_cached_user(sender, instance, update_fields=None, **kwargs):
+    # Logging in only touches last_login, which the cached user need not see
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        token_cache.invalidate_user(instance)
+
+@receiver([post_save, post_delete], sender=Relative)
+def invalidate_conflicts(sender, **kwargs):
+    transaction.on_commit(invalidate_conflict_index)
+
+@receiver(pre_save, sender=Appointment)
+def remember_match(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._previous_match_id = (
+            Appointment.objects.filter(pk=instance.pk).values_list('match_id', flat=True).first()
+        )
+
+@receiver([post_save, post_delete], sender=Appointment)
+def update_match_assignment(sender, instance, **kwargs):
+    match_ids = [instance.match_id, getattr(instance, '_previous_match_id', None)]
+    refresh_assigned(match_ids)
+    rebuild_appointments([instance.pk])
+    rebuild_matches(match_ids)
+
+@receiver(post_save, sender=Match)
+def update_match_schedule(sender, instance, raw=False, **kwargs):
+    if not raw:
+        rebuild_matches([instance.pk])
+
+@receiver(post_delete, sender=Match)
+def remove_match_schedule(sender, instance, **kwargs):
+    ScheduleEntry.objects.filter(match_id=instance.pk).delete()
+
+@receiver(post_save, sender=Club)
+@receiver(post_save, sender=Venue)
+@receiver(post_save, sender=Referee)
+def rename_in_schedule(sender, instance, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        rename(instance)
+
+def place_queries(instance):
+    """
+    What to geocode, most precise first
+    """
+    return [getattr(instance, 'zip_code', None), instance.location]
+
+@receiver(pre_save, sender=Venue)
+@receiver(pre_save, sender=Referee)
+def geocode_location(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Fills in coordinates when they are missing or the location text changed,
+    unless the same save also sets coordinates explicitly
+    """
+    if raw or (update_fields is not None and not {'location', 'zip_code'} & set(update_fields)):
+        instance._coordinates_changed = False
+        return
+
+    previous = None
+    if not instance._state.adding:
+        previous = sender.objects.filter(pk=instance.pk).first()
+
+    current = (instance.latitude, instance.longitude)
+    before = (previous.latitude, previous.longitude) if previous is not None else (None, None)
+    moved = previous is None or place_queries(previous) != place_queries(instance)
+
+    if None in current or (moved and current == before):
+        instance.latitude, instance.longitude = geocode_first(*place_queries(instance)) or (None, None)
+
+    instance._coordinates_changed = (instance.latitude, instance.longitude) != before
+
+@receiver(post_save, sender=Venue)
+@receiver(post_save, sender=Referee)
+def invalidate_distances(sender, instance, **kwargs):
+    if getattr(instance, '_coordinates_changed', True):
+        transaction.on_commit(partial(bump_version, 'locations'))
+
+@receiver(post_delete, sender=Venue)
+@receiver(post_delete, sender=Referee)
+def invalidate_distances_on_delete(sender, **kwargs):
+    transaction.on_commit(partial(bump_version, 'locations'))
+
+@receiver(setting_changed)
+def reset_geocoding(setting, **kwargs):
+    if setting == 'GEOCODING':
+        reset_geocoder()
@@ -0,0 +1,83 @@
+import math
+import threading
+
+from .caching import get_version
+from .distances import haversine_km
+from .models import Referee, Venue
+
+KM_PER_DEGREE = 111.195
+# The cells a query visits grow with the square of its radius
+MAX_RADIUS_KM = 200
+
+class GridIndex:
+    """
+    Points bucketed into a uniform latitude/longitude grid, so a radius query
+    only measures the points in the cells overlapping its bounding box instead
+    of every point
+    """
+    def __init__(self, points, cell_degrees=0.25):
+        self.cell_degrees = cell_degrees
+        self.points = dict(points)
+        self.cells = {}
+        for key, point in self.points.items():
+            self.cells.setdefault(self.cell_of(point), []).append(key)
+
+    def cell_of(self, point):
+        return (math.floor(point[0] / self.cell_degrees), math.floor(point[1] / self.cell_degrees))
+
+    def within(self, origin, radius_km):
+        """
+        [(key, distance_km)] for every point within radius_km of origin, nearest first
+        """
+        lat, lon = origin
+        lat_span = radius_km / KM_PER_DEGREE
+        # Longitude degrees shrink towards the poles; cap the span near them
+        cos_lat = math.cos(math.radians(min(abs(lat) + lat_span, 89.9)))
+        lon_span = min(radius_km / (KM_PER_DEGREE * cos_lat), 180)
+
+        low_row, low_column = self.cell_of((lat - lat_span, lon - lon_span))
+        high_row, high_column = self.cell_of((lat + lat_span, lon + lon_span))
+        found = []
+        for row in range(low_row, high_row + 1):
+            for column in range(low_column, high_column + 1):
+                for key in self.cells.get((row, column), ()):
+                    distance = haversine_km(origin, self.points[key])
+                    if distance <= radius_km:
+                        found.append((key, distance))
+        found.sort(key=lambda item: (item[1], item[0]))
+        return found
+
+_referee_index = (None, None)
+_lock = threading.Lock()
+
+def get_referee_index():
+    """
+    GridIndex over referee home coordinates, kept in process memory and rebuilt
+    when the 'locations' version changes (see signals.py)
+    """
+    global _referee_index
+    token, _ = get_version('locations')
+    current_token, index = _referee_index
+    if current_token != token:
+        with _lock:
+            current_token, index = _referee_index
+            if current_token != token:
+                points = Referee.objects.filter(latitude__isnull=False, longitude__isnull=False).values_list(
+                    'referee_id', 'latitude', 'longitude'
+                )
+                index = GridIndex((referee_id, (lat, lon)) for referee_id, lat, lon in points)
+                _referee_index = (token, index)
+    return index
+
+def referees_near_venue(venue_id, radius_km):
+    """
+    {referee_id: distance_km} for referees living within radius_km of the
+    venue, nearest first. Empty if the venue has no coordinates, None if it
+    does not exist.
+    """
+    venue = Venue.objects.filter(pk=venue_id).values_list('latitude', 'longitude').first()
+    if venue is None:
+        return None
+    if None in venue:
+        return {}
+    return dict(get_referee_index().within(venue, radius_km))
@@ -1,3 +1,1022 @@
+import os
+import tempfile
+from datetime import date, time, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .assignment import hungarian, min_cost_assignment
+from .authentication import TokenCache, token_cache
+from .availability import DateBitmap
+from .caching import bump_version
+from .distances import get_distance_matrix, haversine_km, haversine_matrix
+from .instrumentation import QueryBudgetExceeded, QueryBudgetTestMixin, QueryRecorder, normalize_sql
+from .models import (
+    Appointment, Availability, AvailabilityRule, Club, Match, Notification, Referee, Relative, ScheduleEntry, Venue
+)
+from .spatial import GridIndex
+from . import views
+
+
+def create_referee(referee_id, **kwargs):
+    user = User.objects.create_user(username=referee_id.lower(), **kwargs)
+    return Referee.objects.create(
+        user=user,
+        referee_id=referee_id,
+        first_name='Test',
+        last_name=referee_id,
+        age=30,
+        location='Melbourne',
+        email=f'{referee_id.lower()}@example.com',
+        phone_number='0400000000',
+        experience_years=5,
+        level='2',
+    )
+
+
+def create_fixtures(count, referee=None, offset=0):
+    """
+    Builds count matches, each with its own clubs, venues, referee and appointment
+    """
+    referee = referee or create_referee('REF_OWNER')
+    start = date.today() + timedelta(days=1)
+    for i in range(offset, offset + count):
+        home_venue = Venue.objects.create(venue_id=f'HV{i}', venue_name=f'Home {i}', capacity=100, location='Melbourne')
+        away_venue = Venue.objects.create(venue_id=f'AV{i}', venue_name=f'Away {i}', capacity=100, location='Geelong')
+        home = Club.objects.create(club_id=f'HC{i}', club_name=f'Home {i}', home_venue=home_venue, contact_name='A', contact_phone_number='1')
+        away = Club.objects.create(club_id=f'AC{i}', club_name=f'Away {i}', home_venue=away_venue, contact_name='B', contact_phone_number='2')
+        match = Match.objects.create(
+            match_id=f'M{i}',
+            referee=create_referee(f'REF_M{i}'),
+            home_club=home,
+            away_club=away,
+            venue=home_venue,
+            match_date=start + timedelta(days=i),
+            match_time=time(10, 0),
+            level='2',
+        )
+        Appointment.objects.create(
+            appointment_id=f'A{i}',
+            referee=referee,
+            venue=home_venue,
+            match=match,
+            appointment_date=match.match_date,
+            appointment_time=match.match_time,
+        )
+    return referee
+
+
+class APITestMixin(QueryBudgetTestMixin):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.staff).key}')
+
+
+class QueryInstrumentationTests(APITestMixin, TestCase):
+    def test_normalize_sql_ignores_parameters(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM x WHERE id IN (%s, %s, %s) AND name = 'a'"),
+            normalize_sql("SELECT *  FROM x\nWHERE id IN (%s, %s) AND name = 'b'"),
+        )
+
+    def test_recorder_flags_repeated_shapes(self):
+        create_fixtures(5)
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for appointment in Appointment.objects.all():
+                appointment.referee.user
+        self.assertEqual(recorder.count, 11)
+        self.assertEqual(sorted(recorder.repeated_shapes(5).values()), [5, 5])
+
+    def test_response_reports_query_count(self):
+        response = self.client.get('/api/venues/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('X-Query-Count', response)
+
+    def test_exceeding_budget_fails(self):
+        create_fixtures(1)
+        with mock.patch.object(views.VenueViewSet, 'query_budgets', {'list': 1}, create=True):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get('/api/venues/')
+
+
+class TokenAuthenticationTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='referee', password='secret')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_warm_cache_skips_token_lookup(self):
+        first = self.client.get('/api/venues/')
+        second = self.client.get('/api/venues/')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(int(first['X-Auth-Queries']), 1)
+        self.assertEqual(int(second['X-Auth-Queries']), 0)
+
+    def test_logout_revokes_token(self):
+        self.assertEqual(self.client.get('/api/venues/').status_code, 200)
+        self.assertEqual(self.client.post('/api/auth/logout/').status_code, 200)
+        self.assertEqual(self.client.get('/api/venues/').status_code, 401)
+
+    def test_deleting_token_revokes_it(self):
+        self.assertEqual(self.client.get('/api/venues/').status_code, 200)
+        Token.objects.filter(key=self.token.key).delete()
+        self.assertEqual(self.client.get('/api/venues/').status_code, 401)
+
+    def test_inactive_user_rejected(self):
+        self.assertEqual(self.client.get('/api/venues/').status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/venues/').status_code, 401)
+
+    def test_shared_cache_bypasses_process_memory(self):
+        shared = TokenCache(cache_alias='default')
+        self.assertEqual(shared.resolve(self.token.key), self.user)
+        self.assertEqual(len(shared._entries), 0)
+        self.assertEqual(shared.get(self.token.key), self.user)
+        # Another worker's invalidation is seen immediately
+        TokenCache(cache_alias='default').invalidate_user(self.user)
+        self.assertIsNone(shared.get(self.token.key))
+
+
+class ExplainQueriesTests(TestCase):
+    def test_explains_every_registered_queryset(self):
+        for flags in ([], ['--staff']):
+            out = StringIO()
+            call_command('explain_queries', *flags, stdout=out)
+            self.assertIn('AppointmentViewSet (/api/appointments/)', out.getvalue())
+            self.assertNotIn('AssignmentViewSet', out.getvalue())
+
+
+class AppointmentQueryTests(APITestMixin, TestCase):
+    def list_query_count(self, rows):
+        response = self.client.get('/api/appointments/', {'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], rows)
+        return self.query_count(response, exclude_auth=True)
+
+    def test_list_query_count_is_constant(self):
+        referee = create_fixtures(2)
+        small = self.list_query_count(2)
+        create_fixtures(58, referee=referee, offset=2)
+        self.assertEqual(self.list_query_count(60), small)
+
+    def test_list_renders_full_graph(self):
+        create_fixtures(1)
+        response = self.client.get('/api/appointments/')
+        appointment = response.data['results'][0]
+        self.assertEqual(appointment['referee']['username'], 'ref_owner')
+        self.assertEqual(appointment['match']['referee']['username'], 'ref_m0')
+        self.assertEqual(appointment['match']['home_club']['home_venue']['venue_id'], 'HV0')
+        self.assertEqual(appointment['match']['away_club']['home_venue']['venue_id'], 'AV0')
+
+    def test_retrieve_within_budget(self):
+        create_fixtures(1)
+        response = self.client.get('/api/appointments/A0/')
+        self.assertEqual(response.status_code, 200)
+
+
+class MatchQueryTests(APITestMixin, TestCase):
+    def list_query_count(self, path, params=None):
+        response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('results', response.data)
+        return self.query_count(response, exclude_auth=True), response.data['count']
+
+    def assertConstantQueries(self, path, params=None, unassigned=False):
+        referee = create_fixtures(2)
+        if unassigned:
+            Appointment.objects.all().delete()
+        small, small_count = self.list_query_count(path, params)
+        create_fixtures(30, referee=referee, offset=2)
+        if unassigned:
+            Appointment.objects.all().delete()
+        large, large_count = self.list_query_count(path, params)
+        self.assertGreater(large_count, small_count)
+        self.assertEqual(large, small)
+
+    def test_list(self):
+        self.assertConstantQueries('/api/matches/')
+
+    def test_available(self):
+        self.assertConstantQueries('/api/matches/available/', unassigned=True)
+
+    def test_available_follows_appointment_status(self):
+        create_fixtures(2)
+        self.assertFalse(Match.objects.filter(is_assigned=False).exists())
+
+        appointment = Appointment.objects.get(pk='A0')
+        appointment.status = Appointment.cancelled
+        appointment.save()
+        response = self.client.get('/api/matches/available/')
+        self.assertEqual([m['match_id'] for m in response.data['results']], ['M0'])
+
+        # Detaching an appointment from its match frees the match
+        appointment.status = Appointment.upcoming
+        appointment.save()
+        appointment = Appointment.objects.get(pk='A1')
+        appointment.match_id = None
+        appointment.save()
+        self.assertEqual(list(Match.objects.filter(is_assigned=False).values_list('pk', flat=True)), ['M1'])
+
+        Appointment.objects.filter(pk='A0').delete()
+        response = self.client.get('/api/matches/available/')
+        self.assertEqual([m['match_id'] for m in response.data['results']], ['M0', 'M1'])
+
+    def test_date_range(self):
+        start = date.today()
+        self.assertConstantQueries('/api/matches/date_range/', {
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(days=60)).isoformat(),
+        })
+
+    def test_by_venue(self):
+        create_fixtures(1)
+        response = self.client.get('/api/matches/venue/HV0/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m['match_id'] for m in response.data['results']], ['M0'])
+
+
+class CompactViewTests(APITestMixin, TestCase):
+    def test_appointments_side_load_references(self):
+        referee = create_fixtures(2)
+        full = self.client.get('/api/appointments/')
+        response = self.client.get('/api/appointments/', {'view': 'compact'})
+        self.assertEqual(response.data['count'], full.data['count'])
+
+        row = response.data['results'][0]
+        self.assertEqual(row['referee'], referee.referee_id)
+        self.assertEqual(row['appointment_date'], full.data['results'][0]['appointment_date'])
+
+        included = response.data['included']
+        self.assertEqual(set(included['referees']), {'REF_OWNER', 'REF_M0', 'REF_M1'})
+        self.assertEqual(set(included['clubs']), {'HC0', 'AC0', 'HC1', 'AC1'})
+        self.assertEqual(set(included['venues']), {'HV0', 'AV0', 'HV1', 'AV1'})
+        self.assertEqual(included['matches']['M0']['home_club'], 'HC0')
+
+    def test_compact_query_count_is_constant(self):
+        referee = create_fixtures(2)
+        small = self.client.get('/api/matches/', {'view': 'compact'})
+        create_fixtures(30, referee=referee, offset=2)
+        large = self.client.get('/api/matches/', {'view': 'compact'})
+        self.assertQueryCount(large, self.query_count(small, exclude_auth=True), exclude_auth=True)
+
+
+class NormalizedViewTests(APITestMixin, TestCase):
+    def test_appointments_reference_included_objects(self):
+        create_fixtures(2)
+        full = self.client.get('/api/appointments/')
+        response = self.client.get('/api/appointments/', {'view': 'normalized'})
+
+        row = response.data['results'][0]
+        self.assertEqual(row['referee'], 'REF_OWNER')
+        self.assertEqual(row['match'], 'M0')
+
+        included = response.data['included']
+        match = included['matches']['M0']
+        self.assertEqual(match['home_club'], 'HC0')
+        self.assertEqual(match['referee'], 'REF_M0')
+        self.assertEqual(included['clubs']['HC0']['home_venue'], 'HV0')
+        self.assertEqual(
+            included['referees']['REF_OWNER'],
+            full.data['results'][0]['referee'],
+        )
+        self.assertEqual(len(included['referees']), 3)
+
+    def test_notifications_within_budget(self):
+        referee = create_fixtures(6)
+        for match in Match.objects.all():
+            Notification.objects.create(
+                notification_id=f'N{match.match_id}',
+                referee=referee,
+                match=match,
+                notification_type='assign',
+                date=match.match_date,
+            )
+        response = self.client.get('/api/notifications/', {'view': 'normalized'})
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertEqual(len(response.data['included']['matches']), 6)
+
+
+class KeysetPaginationTests(APITestMixin, TestCase):
+    def walk(self, path, params):
+        ids, queries = [], set()
+        response = self.client.get(path, params)
+        while True:
+            self.assertNotIn('count', response.data)
+            queries.add(self.query_count(response, exclude_auth=True))
+            ids.extend(row.get('appointment_id') or row.get('match_id') for row in response.data['results'])
+            if not response.data['next']:
+                return ids, queries
+            response = self.client.get(response.data['next'])
+
+    def test_appointment_pages_cover_every_row_once(self):
+        create_fixtures(12)
+        # Same date and time for several rows, so the id tie-breaker matters
+        Appointment.objects.filter(appointment_id__in=['A3', 'A4', 'A5']).update(
+            appointment_date=date.today() + timedelta(days=3), appointment_time=None
+        )
+        expected = list(
+            Appointment.objects.order_by('appointment_date', 'appointment_time', 'appointment_id')
+            .values_list('appointment_id', flat=True)
+        )
+        ids, queries = self.walk('/api/appointments/', {'pagination': 'cursor', 'page_size': 5})
+        self.assertEqual(ids, expected)
+        self.assertEqual(queries, {1})
+
+    def test_compact_match_pages(self):
+        create_fixtures(7)
+        ids, _ = self.walk('/api/matches/', {'pagination': 'cursor', 'page_size': 3, 'view': 'compact'})
+        self.assertEqual(ids, [f'M{i}' for i in range(7)])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/matches/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class ReferenceDataCacheTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        create_fixtures(2)
+
+    def test_repeat_request_skips_database(self):
+        first = self.client.get('/api/teams/')
+        second = self.client.get('/api/teams/')
+        self.assertEqual(second.data, first.data)
+        self.assertQueryCount(second, 0, exclude_auth=True)
+
+    def test_conditional_get(self):
+        first = self.client.get('/api/venues/HV0/')
+        response = self.client.get('/api/venues/HV0/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get('/api/venues/HV0/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_saving_a_venue_invalidates(self):
+        first = self.client.get('/api/clubs/HC0/')
+        venue = Venue.objects.get(venue_id='HV0')
+        venue.venue_name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            venue.save()
+            # Not before the write commits, or a concurrent read could cache the old rows
+            self.assertEqual(self.client.get('/api/clubs/HC0/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        self.assertTrue(callbacks)
+
+        response = self.client.get('/api/clubs/HC0/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(response.data['home_venue']['venue_name'], 'Renamed')
+
+
+class AvailabilityDeltaTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.referee = create_referee('REF_AVAIL')
+
+    def post(self, day, available_type='A', **extra):
+        return self.client.post('/api/availability/', {
+            'referee': self.referee.referee_id,
+            'date': (date.today() + timedelta(days=day)).isoformat(),
+            'availableType': available_type,
+            **extra,
+        }, format='json')
+
+    def test_without_version_returns_snapshot(self):
+        self.post(1)
+        response = self.post(2, 'U')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['version'], 2)
+        self.assertEqual(len(response.data['availableDates']), 1)
+        self.assertEqual(len(response.data['unavailableDates']), 1)
+
+    def test_current_version_returns_delta(self):
+        version = self.post(1).data['version']
+        response = self.post(2, 'U', version=version)
+        self.assertEqual(response.data['version'], version + 1)
+        self.assertEqual(response.data['changed']['availableType'], 'U')
+        self.assertNotIn('availableDates', response.data)
+
+        stale = self.post(3, version=version)
+        self.assertIn('availableDates', stale.data)
+
+    def test_update_and_delete_bump_version(self):
+        version = self.post(1).data['version']
+        row = Availability.objects.get(referee=self.referee)
+        response = self.client.patch(f'/api/availability/{row.pk}/', {'availableType': 'U'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.client.delete(f'/api/availability/{row.pk}/')
+
+        # The client holding the first version is sent a snapshot without the deleted date
+        response = self.post(2, version=version)
+        self.assertEqual(response.data['version'], version + 3)
+        self.assertEqual(response.data['availableDates'], [date.today() + timedelta(days=2)])
+
+    def test_snapshot(self):
+        self.post(1)
+        response = self.client.get('/api/availability/snapshot/', {'referee': self.referee.referee_id})
+        self.assertEqual(response.data['version'], 1)
+        self.assertEqual(len(response.data['availableDates']), 1)
+
+
+class AvailabilityBulkTests(APITestMixin, TestCase):
+    def test_weekend_block_out_in_constant_queries(self):
+        referee = create_referee('REF_BULK')
+        start = date(2026, 3, 1)
+        Availability.objects.create(referee=referee, date=start, availableType='A', weekday='Sun')
+
+        response = self.client.post('/api/availability/bulk/', {'items': [
+            {
+                'referee': referee.referee_id, 'availableType': 'U',
+                'start_date': start.isoformat(), 'end_date': (start + timedelta(weeks=20)).isoformat(),
+                'weekdays': ['Sat', 'Sun'],
+            },
+            {'referee': 'NOPE', 'availableType': 'U', 'date': '2026-03-02'},
+            {'referee': referee.referee_id, 'availableType': 'X', 'date': '2026-03-02'},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        first, unknown, invalid = response.data['results']
+        self.assertEqual((first['created'], first['updated']), (40, 1))
+        self.assertEqual(unknown['status'], 'error')
+        self.assertEqual(invalid['status'], 'error')
+        self.assertEqual(response.data['versions'], {referee.referee_id: 1})
+        self.assertEqual(Availability.objects.filter(referee=referee, availableType='U').count(), 41)
+        self.assertMaxQueries(response, 12)
+
+    def test_referee_cannot_write_for_others(self):
+        own = create_referee('REF_OWN')
+        other = create_referee('REF_OTHER')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=own.user).key}')
+        response = client.post('/api/availability/bulk/', [
+            {'referee': other.referee_id, 'availableType': 'U', 'date': '2026-03-02'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Availability.objects.exists())
+
+
+class AvailabilityEncodingTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.referee = create_referee('REF_RANGES')
+        for day in [1, 2, 3, 7, 10, 11]:
+            Availability.objects.create(referee=self.referee, date=date(2026, 5, day), availableType='A')
+        Availability.objects.create(referee=self.referee, date=date(2026, 5, 4), availableType='U')
+
+    def test_ranges(self):
+        response = self.client.get('/api/availability/dates/', {
+            'referee': self.referee.referee_id, 'encoding': 'ranges',
+        })
+        self.assertEqual(response.data, [
+            [date(2026, 5, 1), date(2026, 5, 3)],
+            [date(2026, 5, 7), date(2026, 5, 7)],
+            [date(2026, 5, 10), date(2026, 5, 11)],
+        ])
+
+    def test_invalid_window(self):
+        for params in ({'start': '2026-13-45'}, {'end': 'garbage'}):
+            response = self.client.get('/api/availability/dates/', {'referee': self.referee.referee_id, **params})
+            self.assertEqual(response.status_code, 400)
+
+    def test_bitmap_membership(self):
+        response = self.client.get('/api/availability/bitmap/', {
+            'referee': self.referee.referee_id, 'season': 2026,
+        })
+        available = DateBitmap.from_hex(date(2026, 1, 1), date(2026, 12, 31), response.data['available'])
+        unavailable = DateBitmap.from_hex(date(2026, 1, 1), date(2026, 12, 31), response.data['unavailable'])
+        self.assertIn(date(2026, 5, 7), available)
+        self.assertNotIn(date(2026, 5, 8), available)
+        self.assertEqual(unavailable.dates(), [date(2026, 5, 4)])
+
+    def test_bitmap_cache_follows_writes(self):
+        params = {'referee': self.referee.referee_id, 'season': 2026}
+        before = self.client.get('/api/availability/bitmap/', params).data['available']
+        self.client.post('/api/availability/', {
+            'referee': self.referee.referee_id, 'date': '2026-06-01', 'availableType': 'A',
+        }, format='json')
+        after = self.client.get('/api/availability/bitmap/', params).data['available']
+        self.assertNotEqual(before, after)
+
+
+class AvailabilityRuleTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.referee = create_referee('REF_RULES')
+
+    def test_rules_expand_within_window_and_dates_override(self):
+        # 2026-05-02 is a Saturday
+        response = self.client.post('/api/availability-rules/', {
+            'referee': self.referee.referee_id, 'weekday': 'Sat', 'availableType': 'A',
+            'start_time': '08:00', 'end_time': '14:00',
+            'valid_from': '2026-05-01', 'valid_until': '2026-05-31',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        Availability.objects.create(referee=self.referee, date=date(2026, 5, 9), availableType='U')
+
+        response = self.client.get('/api/availability/resolved/', {
+            'referee': self.referee.referee_id, 'start': '2026-04-01', 'end': '2026-06-30',
+        })
+        days = {day['date']: day for day in response.data}
+        self.assertEqual(
+            sorted(days),
+            [date(2026, 5, 2), date(2026, 5, 9), date(2026, 5, 16), date(2026, 5, 23), date(2026, 5, 30)],
+        )
+        self.assertEqual(days[date(2026, 5, 2)]['source'], 'rule')
+        self.assertEqual(days[date(2026, 5, 2)]['start_time'], time(8, 0))
+        self.assertEqual(days[date(2026, 5, 9)]['availableType'], 'U')
+        self.assertEqual(days[date(2026, 5, 9)]['source'], 'date')
+
+    def test_general_availability_creates_rule(self):
+        response = self.client.post('/api/availability/', {
+            'referee': self.referee.referee_id, 'date': '2026-05-02',
+            'availableType': 'A', 'isGeneral': True,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['changed']['weekday'], 'Sat')
+        self.assertFalse(Availability.objects.exists())
+
+        bitmaps = self.client.get('/api/availability/bitmap/', {
+            'referee': self.referee.referee_id, 'season': 2026,
+        }).data
+        available = DateBitmap.from_hex(date(2026, 1, 1), date(2026, 12, 31), bitmaps['available'])
+        self.assertIn(date(2026, 12, 26), available)
+        self.assertNotIn(date(2026, 4, 25), available)
+
+    def test_date_readers_include_rules(self):
+        today = date.today()
+        Availability.objects.create(referee=self.referee, date=date(2020, 1, 1), availableType='A')
+        response = self.client.post('/api/availability/', {
+            'referee': self.referee.referee_id, 'date': today.isoformat(),
+            'availableType': 'A', 'isGeneral': True,
+        }, format='json')
+        self.assertIn(today, response.data['availableDates'])
+
+        params = {'referee': self.referee.referee_id}
+        dates = self.client.get('/api/availability/dates/', params).data
+        self.assertIn(today, dates)
+        self.assertIn(date(2020, 1, 1), dates)
+        self.assertTrue(all(day.weekday() == today.weekday() for day in dates if day.year == today.year))
+        self.assertIn(today, self.client.get('/api/availability/snapshot/', params).data['availableDates'])
+
+        window = self.client.get('/api/availability/dates/', {
+            **params, 'start': today.isoformat(), 'end': (today + timedelta(days=13)).isoformat(),
+        }).data
+        self.assertEqual(window, [today, today + timedelta(days=7)])
+
+        listed = self.client.get('/api/referee/', {'availability': 'true'}).data['results']
+        filtered = self.client.get('/api/referee/filter/', {'availability': 'true'}).data
+        self.assertEqual([row['referee_id'] for row in listed], [self.referee.referee_id])
+        self.assertEqual([row['referee_id'] for row in filtered], [self.referee.referee_id])
+
+
+class AvailabilityMatrixTests(APITestMixin, TestCase):
+    def test_matrix(self):
+        first = create_referee('REF_A')
+        second = create_referee('REF_B')
+        second.level = '4'
+        second.save()
+        Availability.objects.create(referee=first, date=date(2026, 5, 1), availableType='A')
+        Availability.objects.create(referee=first, date=date(2026, 5, 2), availableType='A')
+        Availability.objects.create(referee=second, date=date(2026, 5, 3), availableType='U')
+        AvailabilityRule.objects.create(
+            referee=second, weekday='Sat', availableType='A', valid_from=date(2026, 1, 1)
+        )
+
+        response = self.client.get('/api/availability/matrix/', {
+            'start': '2026-05-01', 'end': '2026-05-10', 'encoding': 'runs',
+        })
+        self.assertEqual(response.data['days'], 10)
+        self.assertEqual(response.data['available']['REF_A'], [[0, 2]])
+        # Saturdays 2 and 9 May come from the rule
+        self.assertEqual(response.data['available']['REF_B'], [[1, 1], [8, 1]])
+        self.assertEqual(response.data['unavailable']['REF_B'], [[2, 1]])
+        self.assertMaxQueries(response, 4)
+
+        response = self.client.get('/api/availability/matrix/', {
+            'start': '2026-05-01', 'end': '2026-05-10', 'level': '3',
+        })
+        self.assertEqual([row['referee_id'] for row in response.data['referees']], ['REF_B'])
+        self.assertEqual(response.data['available'], {'REF_B': format(0b100000010, 'x')})
+
+
+class AutoAssignmentTests(APITestMixin, TestCase):
+    def test_min_cost_assignment_matches_brute_force(self):
+        from itertools import permutations
+        from random import Random
+
+        rng = Random(7)
+        for _ in range(20):
+            rows, columns = rng.randint(1, 4), rng.randint(1, 5)
+            costs = [[rng.choice([1, 3, 8, 20, 1000]) for _ in range(columns)] for _ in range(rows)]
+            solution = min_cost_assignment(costs, columns, unassigned_cost=100)
+            self.assertEqual(len(set(solution.values())), len(solution))
+            total = sum(costs[row][column] for row, column in solution.items()) + 100 * (rows - len(solution))
+
+            best = min(
+                sum(costs[row][column] if column < columns and costs[row][column] < 100 else 100
+                    for row, column in enumerate(order))
+                for order in permutations(range(columns + rows), rows)
+            )
+            self.assertEqual(total, best)
+
+        self.assertEqual(hungarian([[4, 1, 3], [2, 0, 5]], 3), {0: 1, 1: 0})
+
+    def test_preview_and_commit(self):
+        create_fixtures(2)
+        Appointment.objects.all().delete()
+        first, second = date.today() + timedelta(days=1), date.today() + timedelta(days=2)
+
+        level_two = create_referee('REF_A')
+        level_four = create_referee('REF_B')
+        level_four.level = '4'
+        level_four.save()
+        trainee = create_referee('REF_C')
+        trainee.level = '0'
+        trainee.save()
+        for referee in (level_two, level_four, trainee):
+            for day in (first, second):
+                Availability.objects.create(referee=referee, date=day, availableType='A')
+        # REF_A has a relative at M0's home club, REF_C is below the match level
+        Relative.objects.create(
+            referee=level_two, club_id='HC0', relative_name='Sam', relationship='Sibling', age=12
+        )
+
+        response = self.client.get('/api/assignments/preview/', {
+            'start': first.isoformat(), 'end': second.isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        proposal = {row['match_id']: row['referee_id'] for row in response.data['assignments']}
+        self.assertEqual(proposal, {'M0': 'REF_B', 'M1': 'REF_A'})
+        self.assertEqual(response.data['unassigned'], [])
+        self.assertFalse(Appointment.objects.exists())
+
+        response = self.client.post('/api/assignments/commit/', {
+            'assignments': response.data['assignments'],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            set(Appointment.objects.values_list('match_id', 'referee_id')),
+            {('M0', 'REF_B'), ('M1', 'REF_A')}
+        )
+
+        # Already assigned: nothing is written
+        response = self.client.post('/api/assignments/commit/', {
+            'assignments': [{'match_id': 'M1', 'referee_id': 'REF_C'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Appointment.objects.count(), 2)
+
+    def test_staff_only(self):
+        referee = create_referee('REF_A')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=referee.user).key}')
+        response = self.client.get('/api/assignments/preview/', {'start': '2026-05-01', 'end': '2026-05-02'})
+        self.assertEqual(response.status_code, 403)
+
+
+class ConflictIndexTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        create_fixtures(2)
+        Appointment.objects.all().delete()
+        self.match_date = date.today() + timedelta(days=1)
+        self.related = create_referee('REF_A')
+        self.other = create_referee('REF_B')
+        for referee in (self.related, self.other):
+            Availability.objects.create(referee=referee, date=self.match_date, availableType='A')
+        self.relative = Relative.objects.create(
+            referee=self.related, club_id='AC0', relative_name='Sam', relationship='Sibling', age=12
+        )
+
+    def test_available_referees_excludes_conflicts(self):
+        response = self.client.get('/api/matches/available_referees/', {'match': 'M0'})
+        self.assertEqual([row['referee_id'] for row in response.data], ['REF_B'])
+
+        # The index follows Relative deletes once they commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.relative.delete()
+        response = self.client.get('/api/matches/available_referees/', {'match': 'M0'})
+        self.assertEqual([row['referee_id'] for row in response.data], ['REF_A', 'REF_B'])
+
+    def test_conflicting_appointment_rejected(self):
+        response = self.client.post('/api/appointments/', {
+            'appointment_id': 'A_NEW', 'referee': 'REF_A', 'venue': 'HV0', 'match': 'M0',
+            'appointment_date': self.match_date.isoformat(), 'appointment_time': '10:00',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Appointment.objects.exists())
+
+        Appointment.objects.create(
+            appointment_id='A_OTHER', referee=self.other, venue_id='HV0', match_id='M0',
+            appointment_date=self.match_date, appointment_time=time(10, 0),
+        )
+        response = self.client.patch('/api/appointments/A_OTHER/', {'referee': 'REF_A'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Appointment.objects.get(pk='A_OTHER').referee_id, 'REF_B')
+
+    def test_bulk_conflicts_for_round(self):
+        response = self.client.get('/api/matches/conflicts/', {
+            'start': self.match_date.isoformat(),
+            'end': (self.match_date + timedelta(days=1)).isoformat(),
+        })
+        self.assertEqual(response.data, {'M0': ['REF_A'], 'M1': []})
+        self.assertMaxQueries(response, 3)
+
+
+class DoubleBookingTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        create_fixtures(3)
+        self.day = date.today() + timedelta(days=1)
+        self.referee = create_referee('REF_A')
+        # REF_OWNER already has A0, M0 at 10:00 on day 1
+
+    def item(self, appointment_id, start, referee='REF_OWNER', **kwargs):
+        return {
+            'appointment_id': appointment_id, 'referee': referee, 'venue': 'HV0',
+            'appointment_date': self.day.isoformat(), 'appointment_time': start, **kwargs,
+        }
+
+    def test_create_rejects_overlap(self):
+        response = self.client.post('/api/appointments/', self.item('A_NEW', '11:00'), format='json')
+        self.assertEqual(response.status_code, 400)
+
+        # 90 minutes after a 10:00 start is free again
+        response = self.client.post('/api/appointments/', self.item('A_NEW', '11:30'), format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_update_rejects_overlap(self):
+        # A1 is REF_OWNER's appointment the day after A0
+        response = self.client.put('/api/appointments/A1/', self.item('A1', '10:30'), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('appointment_time', response.data['error'])
+        response = self.client.patch('/api/appointments/A1/', {
+            'appointment_date': self.day.isoformat(), 'appointment_time': '10:30',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertNotEqual(Appointment.objects.get(pk='A1').appointment_date, self.day)
+
+        response = self.client.put('/api/appointments/A1/', self.item('A1', '11:30'), format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_match_duration_by_level(self):
+        with self.settings(MATCH_DURATION={'DEFAULT_MINUTES': 90, 'BY_LEVEL': {'2': 30}}):
+            response = self.client.post('/api/appointments/', self.item('A_NEW', '10:45'), format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_bulk_create(self):
+        items = [self.item(f'B{i}', f'{12 + i * 2:02d}:00', referee='REF_A') for i in range(5)]
+        response = self.client.post('/api/appointments/bulk/', {'items': items}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row['appointment_id'] for row in response.data], [f'B{i}' for i in range(5)])
+
+        response = self.client.post('/api/appointments/bulk/', {'items': [
+            self.item('C0', '09:00'),                      # overlaps A0
+            self.item('C1', '20:00', referee='REF_A'),     # overlaps C2 in the same batch
+            self.item('C2', '20:30', referee='REF_A'),
+            self.item('C3', '07:00', referee='REF_A'),
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted(response.data['error']), [0, 1, 2])
+        self.assertFalse(Appointment.objects.filter(appointment_id__startswith='C').exists())
+
+    def test_bulk_reports_malformed_items(self):
+        response = self.client.post('/api/appointments/bulk/', {'items': [
+            self.item('D0', '12:00', referee=['REF_A']),
+            self.item('D1', '12:00', referee='REF_A', match={'id': 'M0'}),
+            self.item('D2', '14:00', referee='REF_A', distance='far'),
+            self.item('D' * 51, '16:00', referee='REF_A'),
+            self.item('D4', '18:00', referee='REF_A', status=['upcoming']),
+            self.item('D5', '20:00', referee='REF_A', distance='12.5'),
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted(response.data['error']), [0, 1, 2, 3, 4])
+        self.assertIn('referee must be an id of at most 50 characters', response.data['error'][0])
+        self.assertIn('distance must be a number', response.data['error'][2])
+        self.assertFalse(Appointment.objects.filter(appointment_id__startswith='D').exists())
+
+
+class DistanceTests(APITestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        gazetteer = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        gazetteer.write('name,latitude,longitude\nMelbourne,-37.8136,144.9631\nGeelong,-38.1499,144.3617\n3220,-38.1499,144.3617\n')
+        gazetteer.close()
+        self.addCleanup(os.unlink, gazetteer.name)
+        override = self.settings(GEOCODING={'GAZETTEER': gazetteer.name})
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_haversine_matrix(self):
+        melbourne, geelong = (-37.8136, 144.9631), (-38.1499, 144.3617)
+        rows = haversine_matrix([melbourne, None], [melbourne, geelong])
+        self.assertAlmostEqual(rows[0][0], 0)
+        self.assertAlmostEqual(rows[0][1], 64.6, delta=0.5)
+        self.assertEqual(rows[1], [None, None])
+
+    def test_locations_geocoded_on_save(self):
+        create_fixtures(1)
+        venue = Venue.objects.get(pk='AV0')
+        self.assertAlmostEqual(venue.latitude, -38.1499)
+
+        referee = create_referee('REF_A')
+        self.assertAlmostEqual(referee.longitude, 144.9631)
+        referee.location, referee.zip_code = 'Nowhere', '3220'
+        referee.save()
+        self.assertAlmostEqual(referee.longitude, 144.3617)
+        referee.location, referee.zip_code = 'Nowhere', None
+        referee.save()
+        self.assertIsNone(referee.latitude)
+
+    def test_geocode_command_refreshes_cached_venues(self):
+        create_fixtures(1)
+        Venue.objects.update(latitude=None, longitude=None)
+        bump_version('reference')
+        self.assertIsNone(self.client.get('/api/venues/HV0/').data['latitude'])
+
+        call_command('geocode_locations', stdout=StringIO())
+        self.assertAlmostEqual(self.client.get('/api/venues/HV0/').data['latitude'], -37.8136)
+
+    def test_distance_populated_on_create(self):
+        create_fixtures(1)
+        create_referee('REF_A')
+        response = self.client.post('/api/appointments/', {
+            'appointment_id': 'A_NEW', 'referee': 'REF_A', 'venue': 'AV0',
+            'appointment_date': date.today().isoformat(), 'appointment_time': '10:00',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertAlmostEqual(Appointment.objects.get(pk='A_NEW').distance, 64.6, delta=0.5)
+
+        matrix = get_distance_matrix()
+        self.assertAlmostEqual(matrix.get('REF_A', 'AV0'), 64.6, delta=0.5)
+        self.assertAlmostEqual(matrix.get('REF_A', 'HV0'), 0)
+        self.assertIsNone(matrix.get('REF_A', 'UNKNOWN'))
+
+
+class SpatialIndexTests(APITestMixin, TestCase):
+    def test_grid_index_matches_linear_scan(self):
+        from random import Random
+
+        rng = Random(3)
+        points = {f'P{i}': (rng.uniform(-39, -36), rng.uniform(143, 147)) for i in range(300)}
+        index = GridIndex(points.items())
+        origin = (-37.8, 145.0)
+        expected = sorted(
+            (key, haversine_km(origin, point)) for key, point in points.items()
+            if haversine_km(origin, point) <= 40
+        )
+        self.assertEqual(sorted(index.within(origin, 40)), expected)
+        distances = [distance for _, distance in index.within(origin, 40)]
+        self.assertEqual(distances, sorted(distances))
+
+    def test_radius_filters(self):
+        create_fixtures(1)
+        Appointment.objects.all().delete()
+        day = date.today() + timedelta(days=1)
+        for referee_id, (lat, lon) in {
+            'REF_NEAR': (-37.85, 144.95), 'REF_MID': (-37.95, 145.10), 'REF_FAR': (-38.15, 144.36),
+        }.items():
+            referee = create_referee(referee_id)
+            Referee.objects.filter(pk=referee_id).update(latitude=lat, longitude=lon)
+            Availability.objects.create(referee=referee, date=day, availableType='A')
+        Venue.objects.filter(pk='HV0').update(latitude=-37.8136, longitude=144.9631)
+        bump_version('locations')
+
+        response = self.client.get('/api/matches/available_referees/', {'match': 'M0', 'radius_km': 30})
+        self.assertEqual([row['referee_id'] for row in response.data], ['REF_NEAR', 'REF_MID'])
+        self.assertLess(response.data[0]['distance'], response.data[1]['distance'])
+
+        response = self.client.get('/api/referee/filter/', {'near_venue': 'HV0', 'radius_km': 100})
+        self.assertEqual([row['referee_id'] for row in response.data], ['REF_NEAR', 'REF_MID', 'REF_FAR'])
+
+        response = self.client.get('/api/referee/filter/', {'near_venue': 'NOPE', 'radius_km': 10})
+        self.assertEqual(response.status_code, 404)
+
+        for radius in ('nan', 'inf', '-inf', '100000', '0', 'far'):
+            response = self.client.get('/api/referee/filter/', {'near_venue': 'HV0', 'radius_km': radius})
+            self.assertEqual(response.status_code, 400, radius)
+
+
+class ScheduleTests(APITestMixin, TestCase):
+    def test_entries_follow_writes(self):
+        create_fixtures(3)
+        self.assertEqual(ScheduleEntry.objects.count(), 3)
+        self.assertEqual(ScheduleEntry.objects.get(match_id='M0').entry_id, 'A:A0')
+
+        Appointment.objects.filter(pk='A1').delete()
+        self.assertEqual(ScheduleEntry.objects.get(match_id='M1').entry_id, 'M:M1')
+
+        club = Club.objects.get(pk='HC2')
+        club.club_name = 'Renamed'
+        club.save()
+        self.assertEqual(ScheduleEntry.objects.get(match_id='M2').home_club_name, 'Renamed')
+
+        ScheduleEntry.objects.all().delete()
+        call_command('rebuild_schedule', stdout=StringIO())
+        self.assertEqual(
+            sorted(ScheduleEntry.objects.values_list('entry_id', flat=True)), ['A:A0', 'A:A2', 'M:M1']
+        )
+
+    def test_window_and_single_query(self):
+        create_fixtures(6)
+        start = date.today() + timedelta(days=2)
+        response = self.client.get('/api/schedule/', {
+            'start': start.isoformat(), 'end': (start + timedelta(days=2)).isoformat(),
+        })
+        self.assertEqual([row['match_id'] for row in response.data['results']], ['M1', 'M2', 'M3'])
+        self.assertEqual(response.data['results'][0]['venue_name'], 'Home 1')
+        self.assertQueryCount(response, 1, exclude_auth=True)
+
+        response = self.client.get('/api/schedule/', {'club': 'AC4', 'end': (start + timedelta(days=10)).isoformat()})
+        self.assertEqual([row['match_id'] for row in response.data['results']], ['M4'])
+
+
+class CalendarTests(APITestMixin, TestCase):
+    def test_month_merges_appointments_and_availability(self):
+        referee = create_fixtures(3)
+        first = date.today() + timedelta(days=1)
+        Availability.objects.create(referee=referee, date=first, availableType='A', start_time=time(9, 0))
+        Availability.objects.create(referee=referee, date=first + timedelta(days=10), availableType='U')
+
+        response = self.client.get('/api/schedule/calendar/', {
+            'referee': referee.referee_id,
+            'start': first.isoformat(), 'end': (first + timedelta(days=20)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertMaxQueries(response, 5)
+        days, appointments = response.data['days'], response.data['appointments']
+        self.assertEqual(appointments['appointment_id'], ['A0', 'A1', 'A2'])
+        self.assertEqual(days['date'], [first + timedelta(days=offset) for offset in (0, 1, 2, 10)])
+        self.assertEqual(days['availableType'], ['A', None, None, 'U'])
+        self.assertEqual(days['appointments'], [[0], [1], [2], []])
+
+    def test_referees_only_see_their_own(self):
+        referee = create_referee('REF_A')
+        create_referee('REF_B')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=referee.user).key}')
+        response = self.client.get('/api/schedule/calendar/', {'month': '2026-02'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['end'], date(2026, 2, 28))
+        response = self.client.get('/api/schedule/calendar/', {'month': '2026-02', 'referee': 'REF_B'})
+        self.assertEqual(response.status_code, 403)
+
+
+class MatchQueryServiceTests(APITestMixin, TestCase):
+    def match_ids(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertQueryCount(response, 2, exclude_auth=True)
+        rows = response.data['results'] if isinstance(response.data, dict) else response.data
+        return [match['match_id'] for match in rows]
+
+    def test_team_club_and_venue_matches(self):
+        create_fixtures(3)
+        Match.objects.filter(pk='M1').update(away_club_id='HC0')
+
+        self.assertEqual(self.match_ids('/api/teams/HC0/matches/'), ['M0', 'M1'])
+        self.assertEqual(self.match_ids('/api/teams/HC0/home_matches/'), ['M0'])
+        self.assertEqual(self.match_ids('/api/teams/HC0/away_matches/'), ['M1'])
+        self.assertEqual(self.match_ids('/api/clubs/HC0/home_matches/'), ['M0'])
+        self.assertEqual(self.match_ids('/api/venues/HV1/upcoming_matches/'), ['M1'])
+
+        response = self.client.get('/api/teams/HC0/matches/', {'page_size': 1})
+        self.assertEqual([match['match_id'] for match in response.data['results']], ['M0'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'][0]['away_club']['home_venue']['venue_id'], 'HV0')
+        self.assertIsNone(response.data['next'])
+
+    def test_season_fixture_grid(self):
+        create_fixtures(3)
+        Match.objects.filter(pk='M1').update(away_club_id='HC0')
+        start = date.today()
+        response = self.client.get('/api/teams/fixtures/', {
+            'start': start.isoformat(), 'end': (start + timedelta(days=10)).isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['match_id'] for row in response.data['matches']], ['M0', 'M1', 'M2'])
+        self.assertEqual(response.data['clubs']['HC0'], {'home': [0], 'away': [1]})
+        self.assertEqual(response.data['included']['clubs']['HC0']['club_name'], 'Home 0')
+        self.assertIn('HV1', response.data['included']['venues'])
 
-# Create your tests here.
+    def test_match_writes_use_write_serializer(self):
+        create_fixtures(1)
+        response = self.client.post('/api/matches/', {
+            'match_id': 'M_NEW', 'referee': 'REF_M0', 'home_club': 'HC0', 'away_club': 'AC0',
+            'venue': 'HV0', 'match_date': (date.today() + timedelta(days=3)).isoformat(),
+            'match_time': '15:00', 'level': '2',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Match.objects.get(pk='M_NEW').home_club_id, 'HC0')
+        self.assertEqual(ScheduleEntry.objects.get(match_id='M_NEW').entry_id, 'M:M_NEW')
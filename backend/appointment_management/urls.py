@@ -7,6 +7,9 @@ router.register(r'appointments', views.AppointmentViewSet, basename='appointment
 router.register(r'matches', views.MatchViewSet, basename='match')
 router.register(r'referee', views.RefereeViewSet)
 router.register(r'availability', views.AvailabilityViewSet, basename='availability')
+router.register(r'availability-rules', views.AvailabilityRuleViewSet, basename='availability-rule')
+router.register(r'assignments', views.AssignmentViewSet, basename='assignment')
+router.register(r'schedule', views.ScheduleViewSet, basename='schedule')
 router.register(r'venues', views.VenueViewSet)
 router.register(r'teams', views.TeamViewSet, basename='team')
 router.register(r'clubs', views.ClubViewSet)
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.authtoken.models import Token
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404
@@ -12,9 +13,48 @@ from django.db.models import Q
 from django.core.mail import send_mail
 from django.conf import settings
 from datetime import datetime, timedelta
+import math
 from django.utils import timezone
 from .models import Appointment
 from .serializers import AppointmentSerializer, AppointmentWriteSerializer
+from .assignment import AssignmentConflict, AssignmentSolver, commit_assignments, refresh_assigned
+from .authentication import token_cache
+from .booking import Booking, find_overlaps
+from .conflicts import ConflictIndex
+from .distances import distance_between
+from .availability import (
+    apply_availability,
+    availability_dates,
+    availability_matrix,
+    availability_snapshot,
+    available_referee_ids,
+    bump_availability_version,
+    collapse_runs,
+    expand_dates,
+    get_availability_version,
+    get_season_bitmaps,
+    is_stale,
+    resolve_availability,
+    season_window
+)
+from .caching import CachedResponseMixin
+from .pagination import (
+    AppointmentKeysetPagination,
+    KeysetPaginationMixin,
+    MatchKeysetPagination,
+    ScheduleKeysetPagination
+)
+from .representations import (
+    AppointmentSpec,
+    build_included,
+    RefereeSpec,
+    RepresentationViewMixin,
+    MatchSpec,
+    NotificationSpec,
+    PreferenceSpec
+)
+from .schedule import rebuild_appointments, rebuild_matches
+from .spatial import MAX_RADIUS_KM, referees_near_venue
 import uuid
 import logging
 
@@ -23,12 +63,14 @@ logger = logging.getLogger(__name__)
 from .models import (
     Appointment,
     Availability,
+    AvailabilityRule,
     Club,
     Match,
     Notification,
     Preference,
     Referee,
     Relative,
+    ScheduleEntry,
     Venue,
     PasswordReset
 )
@@ -38,6 +80,7 @@ from .serializers import (
     AppointmentWriteSerializer,
     AvailabilitySerializer,
     AvailabilityWriteSerializer,
+    AvailabilityRuleSerializer,
     ClubSerializer,
     ClubWriteSerializer,
     MatchSerializer,
@@ -50,6 +93,7 @@ from .serializers import (
     RefereeWriteSerializer,
     RelativeSerializer,
     RelativeWriteSerializer,
+    ScheduleEntrySerializer,
     VenueSerializer,
     PasswordResetSerializer
 )
@@ -297,6 +341,7 @@ def reset_password(request, token):
 
         user.set_password(new_password)
         user.save()
+        token_cache.invalidate_user(user)
 
         # Clear the reset token
         password_reset.reset_token = None
@@ -318,6 +363,7 @@ def reset_password(request, token):
 @api_view(['POST'])
 def logout_user(request):
     if request.user.is_authenticated:
+        token_cache.invalidate_user(request.user)
         Token.objects.filter(user=request.user).delete()
         return Response({
             'message': 'Successfully logged out'
@@ -326,6 +372,36 @@ def logout_user(request):
         'message': 'Not logged in'
     }, status=status.HTTP_200_OK)
 
+def nearby_referees(request, venue_id=None):
+    """
+    Parses ?radius_km= and ?near_venue= (defaulting to venue_id) into
+    {referee_id: distance_km}, nearest first, or None if no radius was given
+    """
+    radius = request.query_params.get('radius_km')
+    if not radius:
+        return None
+    venue_id = request.query_params.get('near_venue') or venue_id
+    try:
+        radius = float(radius)
+    except ValueError:
+        raise ValidationError({'error': 'radius_km must be a number'})
+    if not venue_id or not math.isfinite(radius) or radius <= 0:
+        raise ValidationError({'error': 'a positive radius_km and near_venue are required'})
+    if radius > MAX_RADIUS_KM:
+        raise ValidationError({'error': f'radius_km cannot exceed {MAX_RADIUS_KM}'})
+    nearby = referees_near_venue(venue_id, radius)
+    if nearby is None:
+        raise NotFound('Venue not found')
+    return nearby
+
+def sort_by_distance(rows, distances):
+    """
+    Adds each serialized referee's distance and orders them nearest first
+    """
+    for row in rows:
+        row['distance'] = distances[row['referee_id']]
+    return sorted(rows, key=lambda row: (row['distance'], row['referee_id']))
+
 # ViewSets
 class RefereeViewSet(viewsets.ModelViewSet):
     queryset = Referee.objects.all()
@@ -351,10 +427,7 @@ class RefereeViewSet(viewsets.ModelViewSet):
             if min_experience:
                 queryset = queryset.filter(experience_years__gte=min_experience)
             if availability:
-                queryset = queryset.filter(
-                    availability__availableType='A',
-                    availability__date=datetime.now().date()
-                )
+                queryset = queryset.filter(referee_id__in=available_referee_ids(timezone.now().date()))
 
         return queryset.distinct()
 
@@ -377,13 +450,15 @@ class RefereeViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(experience_years__gte=int(min_experience))
 
         if availability and availability.lower() == 'true':
-            today = timezone.now().date()
-            queryset = queryset.filter(
-                availability__date=today,
-                availability__availableType='A'
-            )
+            queryset = queryset.filter(referee_id__in=available_referee_ids(timezone.now().date()))
+
+        nearby = nearby_referees(request)
+        if nearby is not None:
+            queryset = queryset.filter(referee_id__in=list(nearby))
 
-        serializer = self.get_serializer(queryset, many=True)
+        serializer = self.get_serializer(queryset.select_related('user'), many=True)
+        if nearby is not None:
+            return Response(sort_by_distance(serializer.data, nearby))
         return Response(serializer.data)
 
 class AppointmentPagination(PageNumberPagination):
@@ -391,11 +466,16 @@ class AppointmentPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+class AppointmentViewSet(KeysetPaginationMixin, RepresentationViewMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     pagination_class = AppointmentPagination
+    keyset_pagination_class = AppointmentKeysetPagination
     queryset = Appointment.objects.all()
     serializer_class = AppointmentSerializer
+    compact_spec = AppointmentSpec
+    # Authentication + count + one joined select, whatever the page size;
+    # compact lists add one query per side-loaded section
+    query_budgets = {'list': 3, 'retrieve': 2, 'list:compact': 7, 'bulk': 18}
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -414,25 +494,19 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         if not self.request.user.is_staff:
             queryset = queryset.filter(referee__user=self.request.user)
 
+        # Everything AppointmentSerializer renders, so a page is a single query
         return queryset.select_related(
-            'referee',
+            'referee__user',
             'venue',
-            'match',
-            'match__home_club',
-            'match__away_club'
+            'match__venue',
+            'match__referee__user',
+            'match__home_club__home_venue',
+            'match__away_club__home_venue'
     )
 
     def list(self, request, *args, **kwargs):
         try:
-            queryset = self.get_queryset()
-            page = self.paginate_queryset(queryset)
-
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-
-            serializer = self.get_serializer(queryset, many=True)
-            return Response(serializer.data)
+            return self.list_response(self.get_queryset())
 
         except Exception as e:
             logger.error(f"Error in AppointmentViewSet.list: {str(e)}", exc_info=True)
@@ -477,10 +551,145 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    # Most appointments a single bulk request may create
+    bulk_max_appointments = 1000
+
+    @action(detail=False, methods=['POST'])
+    def bulk(self, request):
+        """
+        Creates many appointments in one transaction. Referees, venues and matches
+        are looked up once for the whole batch and overlaps are checked against
+        each other and existing bookings in a single query; nothing is written
+        unless every item is valid.
+        """
+        items = request.data.get('items') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+            return Response({
+                'error': 'items must be a non-empty list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.bulk_max_appointments:
+            return Response({
+                'error': f'at most {self.bulk_max_appointments} appointments per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        items = [self.clean_bulk_item(item) for item in items]
+        referees = Referee.objects.in_bulk({item['referee'] for item in items} - {None})
+        venues = Venue.objects.in_bulk({item['venue'] for item in items} - {None})
+        matches = Match.objects.in_bulk({item['match'] for item in items} - {None})
+        ids = [item['appointment_id'] for item in items if item['appointment_id']]
+        taken = set(Appointment.objects.filter(appointment_id__in=ids).values_list('appointment_id', flat=True))
+        statuses = {choice for choice, _ in Appointment.game_status}
+        conflicts = ConflictIndex()
+
+        errors, appointments, bookings, seen_ids = {}, [], [], set()
+        for index, item in enumerate(items):
+            item_errors = item['errors']
+            appointment_id = item['appointment_id'] or f"APT_{uuid.uuid4().hex[:8].upper()}"
+            referee = referees.get(item['referee'])
+            venue = venues.get(item['venue'])
+            match = matches.get(item['match']) if item['match'] else None
+            item_status = item['status']
+
+            if appointment_id in taken or appointment_id in seen_ids:
+                item_errors.append(f'appointment {appointment_id} already exists')
+            if referee is None:
+                item_errors.append('referee not found')
+            if venue is None:
+                item_errors.append('venue not found')
+            if item['match'] and match is None:
+                item_errors.append('match not found')
+            if item_status not in statuses:
+                item_errors.append(f'invalid status {item_status}')
+            try:
+                appointment_date = datetime.strptime(item['appointment_date'], '%Y-%m-%d').date()
+                appointment_time = datetime.strptime(item['appointment_time'], '%H:%M').time()
+            except (TypeError, ValueError):
+                item_errors.append('appointment_date (YYYY-MM-DD) and appointment_time (HH:MM) are required')
+            if item_errors:
+                errors[index] = item_errors
+                continue
+
+            if match is not None and conflicts.has_conflict(referee.referee_id, match.home_club_id, match.away_club_id):
+                errors[index] = ["Referee has a relative at one of the match's clubs."]
+                continue
+
+            seen_ids.add(appointment_id)
+            appointments.append(Appointment(
+                appointment_id=appointment_id,
+                referee=referee,
+                venue=venue,
+                match=match,
+                distance=item['distance'] or distance_between(referee, venue) or 0,
+                appointment_date=appointment_date,
+                appointment_time=appointment_time,
+                status=item_status,
+            ))
+            if item_status != Appointment.cancelled:
+                bookings.append(Booking(
+                    index, None, referee.referee_id, appointment_date, appointment_time,
+                    match.level if match is not None else None
+                ))
+
+        for index, clashes in find_overlaps(bookings).items():
+            errors[index] = [f"Referee is already booked at this time ({', '.join(map(str, clashes))})."]
+
+        if errors:
+            return Response({'error': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            Appointment.objects.bulk_create(appointments)
+            match_ids = {appointment.match_id for appointment in appointments}
+            refresh_assigned(match_ids)
+            rebuild_matches(match_ids)
+            rebuild_appointments(appointment.appointment_id for appointment in appointments if not appointment.match_id)
+
+        spec = AppointmentSpec()
+        rows = spec.values(Appointment.objects.filter(
+            appointment_id__in=[appointment.appointment_id for appointment in appointments]
+        ).order_by('appointment_date', 'appointment_time', 'appointment_id'))
+        return Response(spec.build(rows), status=status.HTTP_201_CREATED)
+
+    @staticmethod
+    def clean_bulk_item(item):
+        """
+        Coerces one bulk item's fields to the types the bulk lookups and
+        bulk_create expect, collecting an error per malformed field
+        """
+        cleaned = {'errors': []}
+        for field in ('appointment_id', 'referee', 'venue', 'match'):
+            model_field = Appointment._meta.get_field(field)
+            max_length = (model_field.target_field if model_field.is_relation else model_field).max_length
+            value = item.get(field)
+            cleaned[field] = None
+            if value in (None, ''):
+                continue
+            if isinstance(value, bool) or not isinstance(value, (str, int)) or len(str(value)) > max_length:
+                cleaned['errors'].append(f'{field} must be an id of at most {max_length} characters')
+                continue
+            cleaned[field] = str(value)
+
+        cleaned['distance'] = None
+        distance = item.get('distance')
+        if distance not in (None, ''):
+            try:
+                if isinstance(distance, bool) or not math.isfinite(float(distance)):
+                    raise ValueError
+                cleaned['distance'] = float(distance)
+            except (TypeError, ValueError):
+                cleaned['errors'].append('distance must be a number')
+
+        cleaned['status'] = str(item.get('status', Appointment.upcoming))
+        cleaned['appointment_date'] = item.get('appointment_date')
+        cleaned['appointment_time'] = item.get('appointment_time')
+        return cleaned
+
     @transaction.atomic
     def update(self, request, *args, **kwargs):
         try:
             return super().update(request, *args, **kwargs)
+        except ValidationError as e:
+            logger.error(f"Validation errors: {e.detail}")
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Error in AppointmentViewSet.update: {str(e)}", exc_info=True)
             return Response(
@@ -517,35 +726,112 @@ class AvailabilityViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(referee__user=self.request.user)
         return queryset
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous_referee_id = serializer.instance.referee_id
+        availability = serializer.save()
+        bump_availability_version(availability.referee_id)
+        if previous_referee_id != availability.referee_id:
+            bump_availability_version(previous_referee_id)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        bump_availability_version(instance.referee_id)
+
+    def dates_response(self, request, available_type):
+        """
+        Dates of one availableType, weekly rules included, optionally limited to
+        a start/end window (see availability_dates for open bounds).
+        ?encoding=ranges returns [start, end] runs of consecutive days instead.
+        """
+        referee_id = request.query_params.get('referee')
+        if not referee_id:
+            return Response({
+                'error': 'referee parameter is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        start = request.query_params.get('start')
+        end = request.query_params.get('end')
+        try:
+            start = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+            end = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+        except ValueError:
+            return Response({
+                'error': 'start and end must be dates (YYYY-MM-DD)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if start and end and (end < start or (end - start).days >= self.max_resolved_days):
+            return Response({
+                'error': f'window must be between 1 and {self.max_resolved_days} days'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        available, unavailable = availability_dates(referee_id, start, end)
+        dates = available if available_type == 'A' else unavailable
+
+        if request.query_params.get('encoding') == 'ranges':
+            return Response(collapse_runs(dates))
+        return Response(list(dates))
+
     @action(detail=False, methods=['GET'])
     def dates(self, request):
+        return self.dates_response(request, 'A')
+
+    @action(detail=False, methods=['GET'])
+    def unavailable(self, request):
+        return self.dates_response(request, 'U')
+
+    @action(detail=False, methods=['GET'])
+    def bitmap(self, request):
+        """
+        A season's availability as two hex bitmaps, bit 0 being 1 January
+        """
         referee_id = request.query_params.get('referee')
         if not referee_id:
             return Response({
                 'error': 'referee parameter is required'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        available_dates = (
-            self.get_queryset()
-            .filter(referee_id=referee_id, availableType='A')
-            .values_list('date', flat=True)
-        )
-        return Response(list(available_dates))
+        try:
+            season = int(request.query_params.get('season', timezone.now().year))
+        except ValueError:
+            return Response({
+                'error': 'season must be a year'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        bitmaps = get_season_bitmaps(referee_id, season)
+        if bitmaps is None:
+            return Response({
+                'error': 'Referee not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        available, unavailable = bitmaps
+        return Response({
+            'season': season,
+            'start': available.start,
+            'days': available.days,
+            'available': available.to_hex(),
+            'unavailable': unavailable.to_hex()
+        })
 
     @action(detail=False, methods=['GET'])
-    def unavailable(self, request):
+    def snapshot(self, request):
         referee_id = request.query_params.get('referee')
         if not referee_id:
             return Response({
                 'error': 'referee parameter is required'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        unavailable_dates = (
-            self.get_queryset()
-            .filter(referee_id=referee_id, availableType='U')
-            .values_list('date', flat=True)
-        )
-        return Response(list(unavailable_dates))
+        version = get_availability_version(referee_id)
+        if version is None:
+            return Response({
+                'error': 'Referee not found'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            'version': version,
+            **availability_snapshot(referee_id)
+        })
 
     def create(self, request, *args, **kwargs):
         data = request.data
@@ -554,6 +840,7 @@ class AvailabilityViewSet(viewsets.ModelViewSet):
         date = data.get('date')
         available_type = data.get('availableType')
         is_general = data.get('isGeneral')
+        client_version = data.get('version')
 
         # Validate required fields
         if not referee_id:
@@ -577,33 +864,47 @@ class AvailabilityViewSet(viewsets.ModelViewSet):
         try:
             is_available = available_type == 'A'
 
-            # Create or update availability
-            availability, created = Availability.objects.update_or_create(
-                referee_id=referee_id,
-                date=date,
-                defaults={
-                    'availableType': available_type,
-                    'weekday': datetime.strptime(date, '%Y-%m-%d').strftime('%a') if not is_general else None,
-                }
-            )
+            weekday = datetime.strptime(date, '%Y-%m-%d').strftime('%a')
+            with transaction.atomic():
+                if is_general:
+                    # General availability becomes an open-ended weekly rule from this date
+                    rule, created = AvailabilityRule.objects.update_or_create(
+                        referee_id=referee_id,
+                        weekday=weekday,
+                        valid_until=None,
+                        defaults={
+                            'availableType': available_type,
+                            'valid_from': date,
+                        }
+                    )
+                    changed = {'weekday': weekday, 'availableType': available_type, 'rule': rule.rule_id}
+                else:
+                    # Create or update availability
+                    availability, created = Availability.objects.update_or_create(
+                        referee_id=referee_id,
+                        date=date,
+                        defaults={
+                            'availableType': available_type,
+                            'weekday': weekday,
+                        }
+                    )
+                    changed = {'date': date, 'availableType': available_type}
+                version = bump_availability_version(referee_id)
+
+            # Only the change when the client's copy was current before this write;
+            # clients that send no version (or an old one) get a full snapshot
+            response_data = {
+                'version': version,
+                'changed': changed
+            }
+            if is_stale(client_version, version):
+                response_data.update(availability_snapshot(referee_id))
 
-            # Return updated lists of dates
-            available_dates = list(
-                Availability.objects
-                .filter(referee_id=referee_id, availableType='A')
-                .values_list('date', flat=True)
-            )
-            unavailable_dates = list(
-                Availability.objects
-                .filter(referee_id=referee_id, availableType='U')
-                .values_list('date', flat=True)
+            return Response(
+                response_data,
+                status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
             )
 
-            return Response({
-                'availableDates': available_dates,
-                'unavailableDates': unavailable_dates
-            }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
-
         except Exception as e:
             print("Error creating availability:", str(e))
             return Response({
@@ -611,24 +912,399 @@ class AvailabilityViewSet(viewsets.ModelViewSet):
                 'received_data': data
             }, status=status.HTTP_400_BAD_REQUEST)
 
-class VenueViewSet(viewsets.ModelViewSet):
+    # Longest window the resolved action expands rules for
+    max_resolved_days = 400
+
+    @action(detail=False, methods=['GET'])
+    def resolved(self, request):
+        """
+        Day-by-day availability of a referee for a start/end window, with
+        recurring rules expanded and explicit dates overriding them
+        """
+        referee_id = request.query_params.get('referee')
+        try:
+            start = datetime.strptime(request.query_params['start'], '%Y-%m-%d').date()
+            end = datetime.strptime(request.query_params['end'], '%Y-%m-%d').date()
+        except (KeyError, ValueError):
+            return Response({
+                'error': 'start and end dates (YYYY-MM-DD) are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if not referee_id:
+            return Response({
+                'error': 'referee parameter is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if end < start or (end - start).days >= self.max_resolved_days:
+            return Response({
+                'error': f'window must be between 1 and {self.max_resolved_days} days'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        days = resolve_availability(start, end, [referee_id]).get(referee_id, {})
+        return Response([
+            {'date': day, **resolved_day._asdict()}
+            for day, resolved_day in sorted(days.items())
+        ])
+
+    @action(detail=False, methods=['GET'])
+    def matrix(self, request):
+        """
+        Referee x date availability for a start/end window, for assigners.
+        Each referee's days are a hex bitset (bit 0 = start) or, with
+        ?encoding=runs, [offset, length] runs. Optionally filtered by ?level=
+        (that level and above).
+        """
+        if not request.user.is_staff:
+            raise PermissionDenied('Only staff can view the availability matrix')
+
+        try:
+            start = datetime.strptime(request.query_params['start'], '%Y-%m-%d').date()
+            end = datetime.strptime(request.query_params['end'], '%Y-%m-%d').date()
+        except (KeyError, ValueError):
+            return Response({
+                'error': 'start and end dates (YYYY-MM-DD) are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if end < start or (end - start).days >= self.max_resolved_days:
+            return Response({
+                'error': f'window must be between 1 and {self.max_resolved_days} days'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        referees = Referee.objects.order_by('referee_id')
+        level = request.query_params.get('level')
+        if level:
+            referees = referees.filter(level__gte=level)
+        spec = RefereeSpec()
+        referee_rows = spec.build(spec.values(referees))
+        # A subquery rather than a list of ids, which could run into SQL Server's parameter limit
+        referee_ids = referees.values('referee_id') if level else None
+
+        runs = request.query_params.get('encoding') == 'runs'
+        available, unavailable = {}, {}
+        for referee_id, (available_days, unavailable_days) in availability_matrix(start, end, referee_ids).items():
+            available[referee_id] = available_days.runs() if runs else available_days.to_hex()
+            unavailable[referee_id] = unavailable_days.runs() if runs else unavailable_days.to_hex()
+
+        return Response({
+            'start': start,
+            'end': end,
+            'days': (end - start).days + 1,
+            'encoding': 'runs' if runs else 'bitset',
+            'referees': referee_rows,
+            'available': available,
+            'unavailable': unavailable
+        })
+
+    # Most dates a single bulk request may write
+    bulk_max_dates = 2000
+
+    @action(detail=False, methods=['POST'])
+    def bulk(self, request):
+        """
+        Applies many availability entries in one transaction. Each item names a
+        referee, an availableType and either a date or a start_date/end_date range,
+        optionally restricted to weekdays (e.g. ["Sat", "Sun"]).
+        """
+        items = request.data.get('items') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({
+                'error': 'items must be a non-empty list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        referee_ids = {str(item.get('referee')) for item in items if isinstance(item, dict)}
+        known_referees = set(Referee.objects.filter(pk__in=referee_ids).values_list('referee_id', flat=True))
+        own_referees = None
+        if not request.user.is_staff:
+            own_referees = set(Referee.objects.filter(user=request.user).values_list('referee_id', flat=True))
+
+        results, entries, item_dates = [], [], {}
+        for index, item in enumerate(items):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError('item must be an object')
+
+                referee_id = str(item.get('referee'))
+                if referee_id not in known_referees:
+                    raise ValueError('unknown referee')
+                if own_referees is not None and referee_id not in own_referees:
+                    raise ValueError('not allowed to change this referee')
+
+                available_type = item.get('availableType')
+                if available_type not in ['A', 'U']:
+                    raise ValueError('availableType must be "A" or "U"')
+
+                if item.get('date'):
+                    dates = [datetime.strptime(item['date'], '%Y-%m-%d').date()]
+                else:
+                    start = datetime.strptime(item['start_date'], '%Y-%m-%d').date()
+                    end = datetime.strptime(item['end_date'], '%Y-%m-%d').date()
+                    if end < start:
+                        raise ValueError('end_date is before start_date')
+                    if (end - start).days >= self.bulk_max_dates:
+                        raise ValueError(f'at most {self.bulk_max_dates} dates per request')
+                    dates = expand_dates(start, end, item.get('weekdays'))
+            except (KeyError, TypeError, ValueError) as e:
+                message = f'missing field {e}' if isinstance(e, KeyError) else str(e)
+                results.append({'index': index, 'status': 'error', 'error': message})
+                continue
+
+            item_dates[index] = [(referee_id, date) for date in dates]
+            entries.extend((referee_id, date, available_type) for date in dates)
+            results.append({'index': index, 'status': 'ok'})
+
+        if len(entries) > self.bulk_max_dates:
+            return Response({
+                'error': f'at most {self.bulk_max_dates} dates per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            outcome, versions = apply_availability(entries)
+
+        for result in results:
+            if result['status'] == 'ok':
+                counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+                for key in item_dates[result['index']]:
+                    counts[outcome[key]] += 1
+                result.update(counts)
+
+        all_failed = all(result['status'] == 'error' for result in results)
+        return Response({
+            'results': results,
+            'versions': versions
+        }, status=status.HTTP_400_BAD_REQUEST if all_failed else status.HTTP_200_OK)
+
+class AvailabilityRuleViewSet(viewsets.ModelViewSet):
+    queryset = AvailabilityRule.objects.all()
+    serializer_class = AvailabilityRuleSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = AvailabilityRule.objects.order_by('referee_id', 'weekday', 'valid_from')
+        referee_id = self.request.query_params.get('referee', None)
+        if referee_id:
+            queryset = queryset.filter(referee_id=referee_id)
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(referee__user=self.request.user)
+        return queryset
+
+    def check_referee(self, referee):
+        if not self.request.user.is_staff and referee.user_id != self.request.user.id:
+            raise PermissionDenied('You can only change your own availability')
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        self.check_referee(serializer.validated_data['referee'])
+        rule = serializer.save()
+        bump_availability_version(rule.referee_id)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        self.check_referee(serializer.validated_data.get('referee', serializer.instance.referee))
+        previous_referee_id = serializer.instance.referee_id
+        rule = serializer.save()
+        bump_availability_version(rule.referee_id)
+        if previous_referee_id != rule.referee_id:
+            bump_availability_version(previous_referee_id)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+        bump_availability_version(instance.referee_id)
+
+class AssignmentViewSet(viewsets.ViewSet):
+    """
+    Automatic referee assignment for a window of unassigned matches: preview
+    proposes an optimal assignment without writing anything, commit creates the
+    (possibly edited) proposal's appointments in one transaction.
+    """
+    permission_classes = [IsAuthenticated]
+    # Both run a fixed number of queries however many matches are involved
+    query_budgets = {'preview': 10, 'commit': 16}
+    # Widest window a single solver run may cover
+    max_window_days = 31
+
+    def check_staff(self):
+        if not self.request.user.is_staff:
+            raise PermissionDenied('Only staff can assign referees')
+
+    @action(detail=False, methods=['GET'])
+    def preview(self, request):
+        self.check_staff()
+        try:
+            start = datetime.strptime(request.query_params['start'], '%Y-%m-%d').date()
+            end = datetime.strptime(request.query_params['end'], '%Y-%m-%d').date()
+        except (KeyError, ValueError):
+            return Response({
+                'error': 'start and end dates (YYYY-MM-DD) are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if end < start or (end - start).days >= self.max_window_days:
+            return Response({
+                'error': f'window must be between 1 and {self.max_window_days} days'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        solver = AssignmentSolver(start, end, level=request.query_params.get('level'))
+        return Response(solver.solve())
+
+    @action(detail=False, methods=['POST'])
+    def commit(self, request):
+        self.check_staff()
+        assignments = request.data.get('assignments')
+        if not isinstance(assignments, list) or not assignments:
+            return Response({
+                'error': 'assignments must be a non-empty list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            pairs = [(item['match_id'], item['referee_id']) for item in assignments]
+        except (KeyError, TypeError):
+            return Response({
+                'error': 'each assignment needs a match_id and a referee_id'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            appointments = commit_assignments(pairs)
+        except AssignmentConflict as e:
+            return Response({'error': 'Assignment conflicts', 'conflicts': e.errors}, status=status.HTTP_409_CONFLICT)
+
+        return Response([
+            {
+                'appointment_id': appointment.appointment_id,
+                'match_id': appointment.match_id,
+                'referee_id': appointment.referee_id,
+                'appointment_date': appointment.appointment_date,
+            }
+            for appointment in appointments
+        ], status=status.HTTP_201_CREATED)
+
+class ScheduleViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Schedule rows from the denormalized ScheduleEntry table: a date window
+    (?start=, ?end=, default the next 30 days) optionally narrowed by ?referee=,
+    ?venue=, ?club= or ?status=, served as a single-table range scan
+    """
+    serializer_class = ScheduleEntrySerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = ScheduleKeysetPagination
+    query_budgets = {'list': 2, 'retrieve': 2, 'calendar': 5}
+
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = ScheduleEntry.objects.all()
+
+        if self.action == 'list':
+            try:
+                start = datetime.strptime(params['start'], '%Y-%m-%d').date() if 'start' in params else timezone.now().date()
+                end = datetime.strptime(params['end'], '%Y-%m-%d').date() if 'end' in params else start + timedelta(days=30)
+            except ValueError:
+                raise ValidationError({'error': 'start and end must be dates (YYYY-MM-DD)'})
+            queryset = queryset.filter(date__range=(start, end))
+
+        if params.get('referee'):
+            queryset = queryset.filter(referee_id=params['referee'])
+        if params.get('venue'):
+            queryset = queryset.filter(venue_id=params['venue'])
+        if params.get('club'):
+            queryset = queryset.filter(Q(home_club_id=params['club']) | Q(away_club_id=params['club']))
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(
+                referee_id__in=Referee.objects.filter(user=self.request.user).values('referee_id')
+            )
+        return queryset.order_by('date', 'time', 'entry_id')
+
+    # Longest window a calendar request may cover, a season
+    max_calendar_days = 400
+    calendar_appointment_columns = (
+        'appointment_id', 'match_id', 'date', 'time', 'status', 'level',
+        'venue_name', 'home_club_name', 'away_club_name', 'distance'
+    )
+
+    @action(detail=False)
+    def calendar(self, request):
+        """
+        A referee's appointments and resolved availability for ?month=YYYY-MM
+        or a ?start=/?end= window, merged per day. Both sections are columnar:
+        one array per field, days listing only dates with something on them
+        and pointing at their appointments by position.
+        """
+        params = request.query_params
+        try:
+            if 'month' in params:
+                start = datetime.strptime(params['month'], '%Y-%m').date()
+                end = (start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+            else:
+                start = datetime.strptime(params['start'], '%Y-%m-%d').date()
+                end = datetime.strptime(params['end'], '%Y-%m-%d').date()
+        except (KeyError, ValueError):
+            return Response({
+                'error': 'month (YYYY-MM) or start and end dates (YYYY-MM-DD) are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if end < start or (end - start).days >= self.max_calendar_days:
+            return Response({
+                'error': f'window must be between 1 and {self.max_calendar_days} days'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        referee_id = params.get('referee')
+        if not request.user.is_staff:
+            own_id = Referee.objects.filter(user=request.user).values_list('referee_id', flat=True).first()
+            if own_id is None or (referee_id and referee_id != own_id):
+                raise PermissionDenied('You can only view your own calendar')
+            referee_id = own_id
+        elif not referee_id:
+            return Response({'error': 'referee is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        columns = self.calendar_appointment_columns
+        rows = list(
+            ScheduleEntry.objects
+            .filter(referee_id=referee_id, date__range=(start, end))
+            .order_by('date', 'time', 'entry_id')
+            .values_list(*columns)
+        )
+        appointments = {name: [row[index] for row in rows] for index, name in enumerate(columns)}
+        by_day = {}
+        for position, day in enumerate(appointments['date']):
+            by_day.setdefault(day, []).append(position)
+        resolved = resolve_availability(start, end, [referee_id]).get(referee_id, {})
+
+        days = {'date': [], 'availableType': [], 'start_time': [], 'end_time': [], 'source': [], 'appointments': []}
+        for day in sorted(set(by_day) | set(resolved)):
+            resolved_day = resolved.get(day)
+            days['date'].append(day)
+            days['availableType'].append(resolved_day.availableType if resolved_day else None)
+            days['start_time'].append(resolved_day.start_time if resolved_day else None)
+            days['end_time'].append(resolved_day.end_time if resolved_day else None)
+            days['source'].append(resolved_day.source if resolved_day else None)
+            days['appointments'].append(by_day.get(day, []))
+
+        return Response({
+            'referee': referee_id,
+            'start': start,
+            'end': end,
+            'days': days,
+            'appointments': appointments,
+        })
+
+class VenueViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Venue.objects.all()
     serializer_class = VenueSerializer
     permission_classes = [IsAuthenticated]
+    cache_group = 'reference'
+    # Authentication + the venue + one joined select of its matches
+    query_budgets = {'upcoming_matches': 3}
 
     @action(detail=True)
     def upcoming_matches(self, request, pk=None):
         venue = self.get_object()
-        matches = Match.objects.filter(
-            venue=venue,
-            match_date__gte=datetime.now().date()
-        ).order_by('match_date')
+        matches = Match.objects.at_venue(venue.pk).upcoming().for_serializer().ordered()
         serializer = MatchSerializer(matches, many=True)
         return Response(serializer.data)
 
-class ClubViewSet(viewsets.ModelViewSet):
-    queryset = Club.objects.all()
+class ClubViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+    queryset = Club.objects.select_related('home_venue')
     permission_classes = [IsAuthenticated]
+    cache_group = 'reference'
+    # Authentication + the club + one joined select of its matches
+    query_budgets = {'home_matches': 3}
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -638,46 +1314,15 @@ class ClubViewSet(viewsets.ModelViewSet):
     @action(detail=True)
     def home_matches(self, request, pk=None):
         club = self.get_object()
-        matches = Match.objects.filter(
-            home_club=club,
-            match_date__gte=datetime.now().date()
-        ).order_by('match_date')
+        matches = Match.objects.home_of(club.pk).upcoming().for_serializer().ordered()
         serializer = MatchSerializer(matches, many=True)
         return Response(serializer.data)
 
-class MatchViewSet(viewsets.ModelViewSet):
-    queryset = Match.objects.all()
-    permission_classes = [IsAuthenticated]
-
-    def get_serializer_class(self):
-        if self.action in ['create', 'update', 'partial_update']:
-            return MatchWriteSerializer
-        return MatchSerializer
-
-    @action(detail=False)
-    def available_referees(self, request):
-        match_date = request.query_params.get('date')
-        level = request.query_params.get('level')
-
-        if not match_date:
-            return Response({
-                'error': 'date parameter is required'
-            }, status=status.HTTP_400_BAD_REQUEST)
-
-        available_referees = Referee.objects.filter(
-            availability__date=match_date,
-            availability__availableType='A'
-        )
-
-        if level:
-            available_referees = available_referees.filter(level__gte=level)
-
-        serializer = RefereeSerializer(available_referees, many=True)
-        return Response(serializer.data)
-
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(RepresentationViewMixin, viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     permission_classes = [IsAuthenticated]
+    compact_spec = NotificationSpec
+    query_budgets = {'list': 3, 'list:compact': 7}
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -685,13 +1330,22 @@ class NotificationViewSet(viewsets.ModelViewSet):
         return NotificationSerializer
 
     def get_queryset(self):
+        queryset = self.queryset.select_related(
+            'referee__user',
+            'match__venue',
+            'match__referee__user',
+            'match__home_club__home_venue',
+            'match__away_club__home_venue'
+        )
         if self.request.user.is_staff:
-            return self.queryset
-        return self.queryset.filter(referee__user=self.request.user)
+            return queryset
+        return queryset.filter(referee__user=self.request.user)
 
-class PreferenceViewSet(viewsets.ModelViewSet):
+class PreferenceViewSet(RepresentationViewMixin, viewsets.ModelViewSet):
     queryset = Preference.objects.all()
     permission_classes = [IsAuthenticated]
+    compact_spec = PreferenceSpec
+    query_budgets = {'list': 3, 'list:compact': 5}
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -699,9 +1353,10 @@ class PreferenceViewSet(viewsets.ModelViewSet):
         return PreferenceSerializer
 
     def get_queryset(self):
+        queryset = self.queryset.select_related('referee__user', 'venue')
         if self.request.user.is_staff:
-            return self.queryset
-        return self.queryset.filter(referee__user=self.request.user)
+            return queryset
+        return queryset.filter(referee__user=self.request.user)
 
 class RelativeViewSet(viewsets.ModelViewSet):
     queryset = Relative.objects.all()
@@ -717,9 +1372,13 @@ class RelativeViewSet(viewsets.ModelViewSet):
             return self.queryset
         return self.queryset.filter(referee__user=self.request.user)
 
-class TeamViewSet(viewsets.ModelViewSet):
+class TeamViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Club.objects.all()
     permission_classes = [IsAuthenticated]
+    cache_group = 'reference'
+    # Authentication + the club + one joined select of its matches; the fixture
+    # grid is one select plus one per side-loaded section
+    query_budgets = {'matches': 3, 'home_matches': 3, 'away_matches': 3, 'fixtures': 5}
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -737,44 +1396,74 @@ class TeamViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def fixtures_response(self, matches):
+        """
+        Keyset-paginated (no COUNT) page of fully rendered matches
+        """
+        paginator = MatchKeysetPagination()
+        page = paginator.paginate_queryset(matches.upcoming().for_serializer(), self.request, view=self)
+        return paginator.get_paginated_response(MatchSerializer(page, many=True).data)
+
     @action(detail=True)
     def matches(self, request, pk=None):
         """Get all matches for a specific team"""
         club = self.get_object()
-        home_matches = Match.objects.filter(
-            home_club=club,
-            match_date__gte=datetime.now().date()
-        )
-        away_matches = Match.objects.filter(
-            away_club=club,
-            match_date__gte=datetime.now().date()
-        )
-
-        all_matches = home_matches.union(away_matches).order_by('match_date')
-        serializer = MatchSerializer(all_matches, many=True)
-        return Response(serializer.data)
+        return self.fixtures_response(Match.objects.for_club(club.pk))
 
     @action(detail=True)
     def home_matches(self, request, pk=None):
         """Get home matches for a specific team"""
         club = self.get_object()
-        matches = Match.objects.filter(
-            home_club=club,
-            match_date__gte=datetime.now().date()
-        ).order_by('match_date')
-        serializer = MatchSerializer(matches, many=True)
-        return Response(serializer.data)
+        return self.fixtures_response(Match.objects.home_of(club.pk))
 
     @action(detail=True)
     def away_matches(self, request, pk=None):
         """Get away matches for a specific team"""
         club = self.get_object()
-        matches = Match.objects.filter(
-            away_club=club,
-            match_date__gte=datetime.now().date()
-        ).order_by('match_date')
-        serializer = MatchSerializer(matches, many=True)
-        return Response(serializer.data)
+        return self.fixtures_response(Match.objects.away_of(club.pk))
+
+    # Longest window a fixture grid may cover, a season
+    max_fixture_days = 400
+
+    @action(detail=False)
+    def fixtures(self, request):
+        """
+        Fixture grid for every club at once, for ?season=YYYY or a ?start=/?end=
+        window: compact match rows, each club's home and away positions in
+        them, and the referenced clubs, venues and referees side-loaded
+        """
+        params = request.query_params
+        try:
+            if 'season' in params:
+                start, end = season_window(int(params['season']))
+            else:
+                start = datetime.strptime(params['start'], '%Y-%m-%d').date()
+                end = datetime.strptime(params['end'], '%Y-%m-%d').date()
+        except (KeyError, ValueError):
+            return Response({
+                'error': 'season (YYYY) or start and end dates (YYYY-MM-DD) are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if end < start or (end - start).days >= self.max_fixture_days:
+            return Response({
+                'error': f'window must be between 1 and {self.max_fixture_days} days'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        spec = MatchSpec()
+        referenced = {}
+        rows = spec.build(spec.values(Match.objects.between(start, end).ordered()), referenced)
+
+        grid = {}
+        for position, row in enumerate(rows):
+            grid.setdefault(row['home_club'], {'home': [], 'away': []})['home'].append(position)
+            grid.setdefault(row['away_club'], {'home': [], 'away': []})['away'].append(position)
+
+        return Response({
+            'start': start,
+            'end': end,
+            'matches': rows,
+            'clubs': grid,
+            'included': build_included(referenced),
+        })
 
     @action(detail=True)
     def venue(self, request, pk=None):
@@ -787,29 +1476,106 @@ class TeamViewSet(viewsets.ModelViewSet):
             'error': 'No home venue assigned'
         }, status=status.HTTP_404_NOT_FOUND)
 
-class MatchViewSet(viewsets.ModelViewSet):
+class MatchPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+class MatchViewSet(KeysetPaginationMixin, RepresentationViewMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
+    pagination_class = MatchPagination
+    keyset_pagination_class = MatchKeysetPagination
     queryset = Match.objects.all()
-    serializer_class = MatchSerializer
+    compact_spec = MatchSpec
+    # Authentication + count + one joined select, whatever the page size;
+    # compact lists add one query per side-loaded section
+    query_budgets = {
+        'list': 3, 'retrieve': 2, 'available': 3, 'by_venue': 3, 'date_range': 3,
+        'list:compact': 6, 'available:compact': 6, 'by_venue:compact': 6, 'date_range:compact': 6,
+        'available_referees': 8, 'conflicts': 3,
+    }
+
+    def get_serializer_class(self):
+        if self.action in ['create', 'update', 'partial_update']:
+            return MatchWriteSerializer
+        return MatchSerializer
 
-    # Base queryset with related fields
+    # Base queryset with everything MatchSerializer renders
     def get_queryset(self):
-        return Match.objects.select_related(
-            'home_club',
-            'away_club',
-            'venue'
-        ).filter(
-            match_date__gte=timezone.now().date()
-        ).order_by('match_date', 'match_time')
-
-    # Get matches that don't have appointments yet
+        return Match.objects.upcoming().for_serializer().ordered()
+
+    @action(detail=False)
+    def available_referees(self, request):
+        """
+        Referees available on ?date=, optionally ?level= and above. With ?match=
+        the date defaults to the match's and referees with a relative at either
+        club are left out. ?radius_km= keeps referees living that close to
+        ?near_venue= (default: the match's venue), nearest first.
+        """
+        match_date = request.query_params.get('date')
+        level = request.query_params.get('level')
+        match_id = request.query_params.get('match')
+
+        conflicted = set()
+        match_venue_id = None
+        if match_id:
+            match = get_object_or_404(Match, pk=match_id)
+            match_date = match_date or match.match_date.isoformat()
+            match_venue_id = match.venue_id
+            conflicted = ConflictIndex().conflicted_referees(match.home_club_id, match.away_club_id)
+
+        try:
+            match_date = datetime.strptime(match_date or '', '%Y-%m-%d').date()
+        except ValueError:
+            return Response({
+                'error': 'date parameter (YYYY-MM-DD) is required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        available_ids = [
+            referee_id for referee_id in available_referee_ids(match_date)
+            if referee_id not in conflicted
+        ]
+        nearby = nearby_referees(request, match_venue_id)
+        if nearby is not None:
+            available_ids = [referee_id for referee_id in available_ids if referee_id in nearby]
+
+        available_referees = Referee.objects.select_related('user').filter(
+            referee_id__in=available_ids
+        ).order_by('referee_id')
+
+        if level:
+            available_referees = available_referees.filter(level__gte=level)
+
+        serializer = RefereeSerializer(available_referees, many=True)
+        if nearby is not None:
+            return Response(sort_by_distance(serializer.data, nearby))
+        return Response(serializer.data)
+
+    @action(detail=False)
+    def conflicts(self, request):
+        """
+        {match_id: [referee ids with a relative at either club]} for the matches
+        between ?start= and ?end=, e.g. a whole round
+        """
+        try:
+            start = datetime.strptime(request.query_params['start'], '%Y-%m-%d').date()
+            end = datetime.strptime(request.query_params['end'], '%Y-%m-%d').date()
+        except (KeyError, ValueError):
+            return Response({
+                'error': 'start and end dates (YYYY-MM-DD) are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        matches = Match.objects.between(start, end).values_list('match_id', 'home_club_id', 'away_club_id')
+        return Response({
+            match_id: sorted(referee_ids)
+            for match_id, referee_ids in ConflictIndex().for_matches(matches).items()
+        })
+
+    # Get matches that have no active appointment yet
     @action(detail=False)
     def available(self, request):
         try:
-            # Get matches that don't have any appointments
-            matches = self.get_queryset().filter(
-                ~Q(appointment__isnull=False)  # No appointment exists
-            )
+            matches = self.get_queryset().unassigned()
 
             # Add optional filters
             level = request.query_params.get('level')
@@ -824,8 +1590,7 @@ class MatchViewSet(viewsets.ModelViewSet):
             if date:
                 matches = matches.filter(match_date=date)
 
-            serializer = self.get_serializer(matches, many=True)
-            return Response(serializer.data)
+            return self.list_response(matches)
 
         except Exception as e:
             logger.error(f"Error fetching available matches: {str(e)}", exc_info=True)
@@ -835,12 +1600,11 @@ class MatchViewSet(viewsets.ModelViewSet):
             )
 
     # Get matches for a specific venue
-    @action(detail=False)
+    @action(detail=False, url_path=r'venue/(?P<venue_id>[^/.]+)')
     def by_venue(self, request, venue_id=None):
         try:
-            matches = self.get_queryset().filter(venue_id=venue_id)
-            serializer = self.get_serializer(matches, many=True)
-            return Response(serializer.data)
+            matches = self.get_queryset().at_venue(venue_id)
+            return self.list_response(matches)
         except Exception as e:
             logger.error(f"Error fetching venue matches: {str(e)}", exc_info=True)
             return Response(
@@ -861,11 +1625,8 @@ class MatchViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            matches = self.get_queryset().filter(
-                match_date__range=[start_date, end_date]
-            )
-            serializer = self.get_serializer(matches, many=True)
-            return Response(serializer.data)
+            matches = self.get_queryset().between(start_date, end_date)
+            return self.list_response(matches)
         except Exception as e:
             logger.error(f"Error fetching matches by date range: {str(e)}", exc_info=True)
             return Response(
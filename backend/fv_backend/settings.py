@@ -42,15 +42,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'appointment_management.instrumentation.QueryInstrumentationMiddleware',
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    'appointment_management.authentication.RequestAuthenticationMiddleware',
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     'corsheaders.middleware.CorsMiddleware',
-    'appointment_management.authentication.TokenAuthenticationMiddleware',
 ]
 
 ROOT_URLCONF = "fv_backend.urls"
@@ -111,8 +111,7 @@ AUTH_PASSWORD_VALIDATORS = [
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
-        'rest_framework.authentication.SessionAuthentication',
+        'appointment_management.authentication.RequestAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -173,9 +172,56 @@ SESSION_COOKIE_SAMESITE = 'Lax'
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
 
+# Per-request query counting, N+1 detection and ViewSet query_budgets checks
+# Development only; tests switch on STRICT through QueryBudgetTestMixin
+QUERY_INSTRUMENTATION = {
+    'ENABLED': DEBUG,
+    'STRICT': False,
+    'N_PLUS_ONE_THRESHOLD': 5,
+}
+
+# Caches. The default local-memory cache is per process: point 'default' at a
+# shared backend (database, Redis, Memcached) when running several workers so
+# cache invalidation reaches all of them
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Venue/club/team list and detail responses, invalidated when a Venue or Club changes.
+# Also holds the conflict index and the version stamps behind the distance and
+# spatial indexes; with a per-process cache, TIMEOUT bounds how long other workers
+# can serve data from before a change.
+REFERENCE_DATA_CACHE = {
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 3600,  # seconds
+}
+
+# Estimated match length used to detect double-booked referees, keyed by Match.level
+MATCH_DURATION = {
+    'DEFAULT_MINUTES': 90,
+    'BY_LEVEL': {},
+}
+
+# Offline geocoding of venue and referee locations. GAZETTEER is a CSV file with
+# name, latitude and longitude columns, name being a suburb, town or postcode
+GEOCODING = {
+    'BACKEND': 'appointment_management.geocoding.GazetteerGeocoder',
+    'GAZETTEER': None,
+}
+
 # Token expiration settings (optional)
 TOKEN_EXPIRED_AFTER_SECONDS = 86400  # 24 hours
 
+# Token resolution cache used by RequestAuthenticationMiddleware
+# Set CACHE_ALIAS to one of CACHES to share resolved tokens between workers
+TOKEN_CACHE = {
+    'MAX_SIZE': 1024,
+    'TIMEOUT': 300,  # seconds
+    'CACHE_ALIAS': None,
+}
+
 # Email settings (TODO: update these with email provider details for password reset functionality)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # For development
 EMAIL_HOST = 'smtp.gmail.com'  # Update with your email provider
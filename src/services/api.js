@@ -214,6 +214,9 @@ export const availabilityService = {
         api.get(`/availability/dates/?referee=${refereeId}`),
     getUnavailableDates: (refereeId) =>
         api.get(`/availability/unavailable/?referee=${refereeId}`),
+    // Appointments and availability for one month (YYYY-MM) in a single request
+    getCalendar: (refereeId, month) =>
+        api.get(`/schedule/calendar/?referee=${refereeId}&month=${month}`),
 };
 
 // Venue endpoints
@@ -259,6 +262,8 @@ export const teamService = {
     createTeam: (data) => api.post("/teams/", data),
     updateTeam: (id, data) => api.put(`/teams/${id}/`, data),
     deleteTeam: (id) => api.delete(`/teams/${id}/`),
+    // Every club's fixtures for a season in one request
+    getFixtureGrid: (season) => api.get(`/teams/fixtures/?season=${season}`),
 };
 
 // Request interceptor for adding auth token